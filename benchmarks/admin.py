@@ -0,0 +1,141 @@
+"""Список заметок в админке: ModelAdmin по умолчанию и NoteAdmin.
+
+Пример запуска::
+
+    python -m benchmarks.admin --notes 1000000 --output admin.json
+
+База наполняется так же, как командой seed_notes, и анализируется
+(ANALYZE), после чего суперпользователь через тестовый клиент в том же
+процессе открывает первую страницу списка, страницу фильтра по автору
+и поиск по имени автора — сначала с admin.ModelAdmin, как было
+до NoteAdmin, затем с NoteAdmin. В отчёте — SQL-запросов на страницу,
+время в базе и задержки страниц. На SQLite большую часть времени
+занимает отрисовка строк списка, а не запросы.
+"""
+import argparse
+import time
+from contextlib import contextmanager
+from importlib import import_module, reload
+
+from benchmarks.utils import (bench_database, seed_notes, setup_django,
+                              summarize, write_report)
+
+
+@contextmanager
+def count_queries(connection):
+    counter = {'queries': 0, 'seconds': 0.0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter['queries'] += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            counter['seconds'] += time.perf_counter() - started
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+def reload_urls():
+    """Пересобирает URL админки: представления привязаны к экземпляру
+    ModelAdmin, который был зарегистрирован при загрузке urls."""
+    from django.conf import settings
+    from django.urls import clear_url_caches
+
+    reload(import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def registered(model, model_admin):
+    from django.contrib import admin
+
+    previous = admin.site._registry[model]
+    admin.site._registry[model] = model_admin
+    reload_urls()
+    try:
+        yield
+    finally:
+        admin.site._registry[model] = previous
+        reload_urls()
+
+
+def run_pages(connection, client, pages, repeat):
+    results = {}
+    for name, params in pages.items():
+        client.get('/admin/notes/note/', params)
+        latencies = []
+        with count_queries(connection) as counter:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = client.get('/admin/notes/note/', params)
+                latencies.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            'status': response.status_code,
+            'queries_per_request': counter['queries'] / repeat,
+            'db_ms_per_request': round(
+                counter['seconds'] * 1000 / repeat, 3
+            ),
+            'latency': summarize(latencies),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib import admin
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    from notes.models import Note
+
+    with bench_database() as connection:
+        user_ids = seed_notes(connection, args.notes, args.users)
+        superuser = get_user_model().objects.create_superuser(
+            'bench-admin', password='bench-password'
+        )
+        client = Client()
+        client.force_login(superuser)
+        author = get_user_model().objects.get(pk=user_ids[0])
+        pages = {
+            'first_page': {},
+            'author_filter': {'author': author.pk},
+            'author_search': {'q': author.username},
+        }
+        # У ModelAdmin по умолчанию нет ни фильтра author=, ни поиска:
+        # фильтруем стандартным параметром, поиск не сравниваем.
+        default_pages = {
+            'first_page': {},
+            'author_filter': {'author__id__exact': author.pk},
+        }
+        with registered(Note, admin.ModelAdmin(Note, admin.site)):
+            default = run_pages(
+                connection, client, default_pages, args.repeat
+            )
+        report = {
+            'vendor': connection.vendor,
+            'notes': args.notes,
+            'default': default,
+            'note_admin': run_pages(connection, client, pages, args.repeat),
+        }
+
+    for name in ('default', 'note_admin'):
+        for page, result in report[name].items():
+            print(f'{name} {page}: {result["status"]}, '
+                  f'{result["queries_per_request"]} запросов, '
+                  f'в базе {result["db_ms_per_request"]} ms, '
+                  f'p50 {result["latency"]["median_ms"]} ms')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Пропускная способность и задержки страниц чтения под WSGI и ASGI.
+
+Пример запуска::
+
+    python -m benchmarks.asgi_wsgi --requests 5000 --concurrency 200
+
+Оба приложения вызываются в одном процессе, без сети: WSGI — из пула
+потоков размером --concurrency (как многопоточный WSGI-сервер), ASGI —
+из цикла событий с тем же числом одновременных запросов. Под ASGI
+главная, список и заметка переключаются на notes.async_views, как при
+NOTES_ASYNC_VIEWS=1. Смесь запросов: главная, список и заметки
+одного автора.
+"""
+import argparse
+import asyncio
+import importlib
+import io
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import (bench_database, seed_notes, setup_django,
+                              summarize, write_report)
+
+
+def login_cookie(user_id):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    client = Client()
+    client.force_login(get_user_model().objects.get(pk=user_id))
+    return '{}={}'.format(
+        settings.SESSION_COOKIE_NAME,
+        client.cookies[settings.SESSION_COOKIE_NAME].value,
+    )
+
+
+def request_mix(author_id, count, rng):
+    from notes.models import Note
+
+    slugs = list(
+        Note.objects.filter(author_id=author_id).values_list('slug', flat=True)
+    )
+    paths = ['/', '/notes/'] + [f'/note/{slug}/' for slug in slugs[:100]]
+    # Примерно поровну главной, списка и заметок.
+    weights = [len(paths) - 2, len(paths) - 2] + [2] * (len(paths) - 2)
+    return rng.choices(paths, weights, k=count)
+
+
+def run_wsgi(paths, cookie, concurrency):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+
+    def call(path):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'HTTP_COOKIE': cookie,
+            'wsgi.input': io.BytesIO(),
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': io.StringIO(),
+        }
+        statuses = []
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers: statuses.append(
+            status
+        ))
+        b''.join(response)
+        response.close()
+        elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, int(statuses[0].split()[0])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, paths))
+    return results, time.perf_counter() - started
+
+
+def switch_to_async_views():
+    from django.conf import settings
+    from django.urls import clear_url_caches
+
+    settings.NOTES_ASYNC_VIEWS = True
+    for module in ('notes.urls', 'yanote.urls'):
+        importlib.reload(importlib.import_module(module))
+    clear_url_caches()
+
+
+def run_asgi(paths, cookie, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+
+    async def call(path, semaphore):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        statuses = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            return (time.perf_counter() - started) * 1000, statuses[0]
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(call(path, semaphore) for path in paths))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    return results, time.perf_counter() - started
+
+
+def summarize_run(results, elapsed):
+    latencies = [latency for latency, _ in results]
+    errors = sum(1 for _, status in results if status != 200)
+    return {
+        'requests_per_second': round(len(results) / elapsed, 1),
+        'errors': errors,
+        'latency': summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    with bench_database() as connection:
+        author_id = seed_notes(connection, args.notes, args.users)[0]
+        cookie = login_cookie(author_id)
+        paths = request_mix(author_id, args.requests, random.Random(args.seed))
+        report = {
+            'vendor': connection.vendor,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'wsgi': summarize_run(*run_wsgi(paths, cookie, args.concurrency)),
+        }
+        switch_to_async_views()
+        report['asgi'] = summarize_run(
+            *run_asgi(paths, cookie, args.concurrency)
+        )
+        report['asgi_db_threads'] = settings.NOTES_ASYNC_DB_THREADS
+
+    for mode in ('wsgi', 'asgi'):
+        result = report[mode]
+        print(f'{mode}: {result["requests_per_second"]} rps, '
+              f'p50 {result["latency"]["median_ms"]} ms, '
+              f'p99 {result["latency"]["p99_ms"]} ms, '
+              f'ошибок {result["errors"]}')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Цена сжатия страниц notes: время процессора против сэкономленных байт.
+
+Пример запуска::
+
+    python -m benchmarks.compression --notes 2000 --output compression.json
+
+База наполняется так же, как командой seed_notes; автор открывает
+список (страница из --page-size заметок) и заметку с текстом
+в --text-size символов, тела ответов сохраняются. Каждое тело
+сжимается gzip с уровнями из GZIP_LEVELS и, если установлен пакет
+brotli, brotli с качеством из BROTLI_QUALITIES. В отчёте — размер
+до и после, доля сэкономленных байт и время сжатия, а также время
+CompressionMiddleware, когда сжатая страница уже лежит в кэше.
+"""
+import argparse
+
+from benchmarks.utils import (bench_database, measure, seed_notes,
+                              setup_django, summarize, write_report)
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 5, 11)
+
+
+def compress_modes():
+    from notes import compression
+
+    modes = [('gzip', 'NOTES_GZIP_LEVEL', level) for level in GZIP_LEVELS]
+    if compression.brotli is not None:
+        modes += [
+            ('br', 'NOTES_BROTLI_QUALITY', quality)
+            for quality in BROTLI_QUALITIES
+        ]
+    return modes
+
+
+def run_page(body, repeat):
+    from django.test import override_settings
+
+    from notes import compression
+
+    results = {}
+    for encoding, setting, value in compress_modes():
+        with override_settings(**{setting: value}):
+            size = len(compression.compress(body, encoding))
+            samples = measure(
+                lambda: compression.compress(body, encoding), repeat
+            )
+        results[f'{encoding}-{value}'] = {
+            'bytes': size,
+            'saved': round(1 - size / len(body), 3),
+            'mb_per_second': round(
+                len(body) / 1024 / 1024
+                / (summarize(samples)['median_ms'] / 1000), 1
+            ),
+            'latency': summarize(samples),
+        }
+    return {'bytes': len(body), 'modes': results}
+
+
+def middleware_latency(body, repeat):
+    """Время CompressionMiddleware на странице с ETag: со сжатием
+    и когда сжатое тело уже лежит в кэше."""
+    from itertools import count
+
+    from django.core.cache import cache
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    from notes.compression import CompressionMiddleware
+
+    middleware = CompressionMiddleware(lambda request: None)
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+    versions = count()
+
+    def respond(etag):
+        response = HttpResponse(body)
+        response['ETag'] = etag
+        middleware.process(request, response)
+
+    cache.clear()
+    # Новая версия на каждый вызов: в кэше сжатой страницы ещё нет.
+    cold = measure(lambda: respond(f'"bench:{next(versions)}"'), repeat)
+    warm = measure(lambda: respond('"bench:0"'), repeat)
+    cache.clear()
+    return {'compress': summarize(cold), 'cached': summarize(warm)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--text-size', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import Client, override_settings
+
+    from notes.models import Note
+
+    with bench_database() as connection, override_settings(
+            NOTES_PAGE_SIZE=args.page_size,
+            # Текст заметки отдаётся целиком, без потоковой распаковки.
+            NOTES_COMPRESS_TEXT_OVER=args.text_size):
+        author_id = seed_notes(connection, args.notes, 1)[0]
+        author = get_user_model().objects.get(pk=author_id)
+        note = Note.objects.filter(author=author).first()
+        note.text = ('Длинная строка заметки с <разметкой> & словами. '
+                     * (args.text_size // 48))[:args.text_size]
+        note.save()
+        client = Client()
+        client.force_login(author)
+        paths = {'list': '/notes/', 'detail': f'/note/{note.slug}/'}
+        pages = {}
+        for page, path in paths.items():
+            body = client.get(path).content
+            pages[page] = {
+                **run_page(body, args.repeat),
+                'middleware': middleware_latency(body, args.repeat),
+            }
+        report = {
+            'vendor': connection.vendor,
+            'page_size': args.page_size,
+            'text_size': args.text_size,
+            'pages': pages,
+        }
+
+    for page, result in report['pages'].items():
+        print(f'{page}: {result["bytes"]} байт')
+        for mode, mode_result in result['modes'].items():
+            print(f'  {mode}: {mode_result["bytes"]} байт '
+                  f'(-{mode_result["saved"]:.0%}), '
+                  f'p50 {mode_result["latency"]["median_ms"]} ms, '
+                  f'{mode_result["mb_per_second"]} МБ/с')
+        middleware = result['middleware']
+        print(f'  CompressionMiddleware: '
+              f'p50 {middleware["compress"]["median_ms"]} ms, '
+              f'из кэша p50 {middleware["cached"]["median_ms"]} ms')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
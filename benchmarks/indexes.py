@@ -0,0 +1,97 @@
+"""Планы запросов и тайминги с составными индексами Note и без них.
+
+Пример запуска::
+
+    python -m benchmarks.indexes --notes 2000000 --users 1000
+
+Скрипт наполняет отдельную базу заметками, затем измеряет запросы
+страницы списка, «глубокой» страницы по курсору и поиска по slug:
+с индексами текущей схемы — (author, id) и уникальным (author, slug) —
+и после отката к миграции 0002, где есть только индекс по author
+и глобальный уникальный индекс по slug.
+"""
+import argparse
+
+from benchmarks.utils import (bench_database, measure, seed_notes,
+                              setup_django, summarize, write_report)
+
+PAGE_SIZE = 50
+
+
+def build_queries(author_id):
+    from notes.models import Note
+
+    notes = Note.objects.filter(author_id=author_id)
+    ids = list(notes.order_by('id').values_list('id', flat=True))
+    middle_id = ids[len(ids) // 2]
+    slug = notes.get(id=ids[-1]).slug
+    listed = notes.only('id', 'slug', 'title').order_by('id')
+    return {
+        'list_first_page': listed[:PAGE_SIZE],
+        'list_deep_page': listed.filter(id__gt=middle_id)[:PAGE_SIZE],
+        # Только столбцы, существующие и в схеме миграции 0002.
+        'detail_by_slug': notes.filter(slug=slug).only(
+            'id', 'title', 'text', 'slug', 'author'
+        ),
+    }
+
+
+def run_queries(queries, repeat):
+    return {
+        name: {
+            'plan': queryset.explain(),
+            'timings': summarize(
+                measure(lambda: list(queryset.all()), repeat)
+            ),
+        }
+        for name, queryset in queries.items()
+    }
+
+
+def migrate_to_baseline():
+    """Откатывает схему Note к миграции 0002.
+
+    Там остаются только индекс внешнего ключа author и глобально
+    уникальный индекс по slug.
+    """
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command('migrate', 'notes', '0002', verbosity=0)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=2000000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    with bench_database() as connection:
+        author_id = seed_notes(connection, args.notes, args.users)[0]
+        queries = build_queries(author_id)
+        report = {
+            'vendor': connection.vendor,
+            'notes': args.notes,
+            'users': args.users,
+            'current_schema': run_queries(queries, args.repeat),
+        }
+        migrate_to_baseline()
+        report['migration_0002'] = run_queries(queries, args.repeat)
+
+    for variant in ('migration_0002', 'current_schema'):
+        print(f'== {variant} ({report["vendor"]})')
+        for name, result in report[variant].items():
+            print(f'{name}: median {result["timings"]["median_ms"]} ms, '
+                  f'p99 {result["timings"]["p99_ms"]} ms')
+            print(f'  {result["plan"]}')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
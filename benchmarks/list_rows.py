@@ -0,0 +1,92 @@
+"""Память и задержка большого списка: модели против кортежей и потока.
+
+Пример запуска::
+
+    python -m benchmarks.list_rows --notes 20000 --page-size 20000 \\
+        --output list_rows.json
+
+База наполняется так же, как командой seed_notes; все заметки
+принадлежат одному автору, и он открывает список со страницей
+в --page-size заметок — сначала из моделей Note, затем
+с NOTES_LIST_ROWS (именованные кортежи, отдача потоком). Ответ
+читается частями, как его читал бы сервер. В отчёте — задержки
+и пик выделенной на запрос памяти по tracemalloc.
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.utils import (bench_database, seed_notes, setup_django,
+                              summarize, write_report)
+
+
+def read_response(client, path):
+    """Запрашивает страницу и читает ответ так же, как сервер WSGI."""
+    response = client.get(path)
+    size = 0
+    for part in response:
+        size += len(part)
+    response.close()
+    return size
+
+
+def run_mode(client, path, rows, repeat):
+    from django.test import override_settings
+
+    with override_settings(NOTES_LIST_ROWS=rows):
+        # Прогрев: шаблоны и запросы в кэшах.
+        size = read_response(client, path)
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            read_response(client, path)
+            latencies.append((time.perf_counter() - started) * 1000)
+        tracemalloc.start()
+        read_response(client, path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        'bytes': size,
+        'peak_kib': round(peak / 1024, 1),
+        'latency': summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import Client, override_settings
+
+    with bench_database() as connection, override_settings(
+            NOTES_PAGE_SIZE=args.page_size):
+        author_id = seed_notes(connection, args.notes, 1)[0]
+        client = Client()
+        client.force_login(get_user_model().objects.get(pk=author_id))
+        modes = {
+            'models': run_mode(client, '/notes/', False, args.repeat),
+            'rows': run_mode(client, '/notes/', True, args.repeat),
+        }
+        report = {
+            'vendor': connection.vendor,
+            'notes': args.notes,
+            'page_size': args.page_size,
+            'modes': modes,
+        }
+
+    for name, result in report['modes'].items():
+        print(f'{name}: p50 {result["latency"]["median_ms"]} ms, '
+              f'пик памяти {result["peak_kib"]} KiB, '
+              f'{result["bytes"]} байт')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
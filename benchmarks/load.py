@@ -0,0 +1,266 @@
+"""Нагрузочный прогон страниц notes:* и users:* со смесью действий.
+
+Пример запуска::
+
+    python -m benchmarks.load --users 50 --notes-per-user 200 \\
+        --requests 20000 --concurrency 16 --output load.json
+
+База наполняется так же, как командой seed_notes. Каждый из
+--concurrency потоков входит под своим пользователем и через тестовый
+клиент Django в том же процессе (без сети и без проверки CSRF)
+выполняет случайные действия с весами из ACTIONS: чтение главной,
+списка, заметок и поиска, создание, правку и удаление заметок, вход
+и выход. Отчёт — пропускная способность, задержки по каждому действию
+и число ошибок — сохраняется в JSON, чтобы прогоны можно было сравнивать.
+"""
+import argparse
+import random
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import (bench_database, seed_notes, setup_django,
+                              summarize, write_report)
+
+LOGIN_URL = '/auth/login/'
+
+# Действие и его вес в смеси запросов.
+ACTIONS = {
+    'home': 8,
+    'list': 25,
+    'list_next': 5,
+    'detail': 25,
+    'search': 8,
+    'create': 6,
+    'edit': 4,
+    'delete': 2,
+    'success': 2,
+    'login_page': 3,
+    'signup_page': 2,
+    'relogin': 2,
+}
+
+
+class VirtualUser:
+    """Пользователь, который по очереди выполняет действия смеси."""
+
+    def __init__(self, number, username, password, notes, rng):
+        from django.test import Client
+
+        self.number = number
+        self.username = username
+        self.password = password
+        self.notes = notes
+        self.created = []
+        self.rng = rng
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.client = Client()
+        self.login()
+
+    def request(self, action, method, url, data=None):
+        started = time.perf_counter()
+        try:
+            response = getattr(self.client, method)(url, data)
+        except Exception:
+            # Тестовый клиент пробрасывает исключения представлений,
+            # например «database is locked» на SQLite.
+            response = None
+        self.samples[action].append((time.perf_counter() - started) * 1000)
+        if (response is None or response.status_code >= 400
+                # Сессия потеряна: страница отправила на вход.
+                or response.get('Location', '').startswith(LOGIN_URL)):
+            self.errors[action] += 1
+
+    def run(self, action):
+        getattr(self, action)()
+
+    def home(self):
+        self.request('home', 'get', '/')
+
+    def list(self):
+        self.request('list', 'get', '/notes/')
+
+    def list_next(self):
+        from notes.pagination import encode_cursor
+
+        note_id, _ = self.rng.choice(self.notes)
+        self.request(
+            'list_next', 'get', '/notes/', {'after': encode_cursor(note_id)}
+        )
+
+    def detail(self):
+        _, slug = self.rng.choice(self.notes)
+        self.request('detail', 'get', f'/note/{slug}/')
+
+    def search(self):
+        _, slug = self.rng.choice(self.notes)
+        self.request('search', 'get', '/search/', {
+            'q': slug.rsplit('-', 1)[-1][:3],
+        })
+
+    def create(self):
+        slug = f'load-{self.number}-{uuid.uuid4().hex[:12]}'
+        self.request('create', 'post', '/add/', {
+            'title': f'Нагрузка {slug}', 'text': 'Текст ' * 50, 'slug': slug,
+        })
+        self.created.append(slug)
+
+    def edit(self):
+        _, slug = self.rng.choice(self.notes)
+        self.request('edit', 'post', f'/edit/{slug}/', {
+            'title': f'Правка {slug}', 'text': 'Новый текст ' * 20,
+            'slug': slug,
+        })
+
+    def delete(self):
+        if not self.created:
+            self.detail()
+            return
+        self.request('delete', 'post', f'/delete/{self.created.pop()}/')
+
+    def success(self):
+        self.request('success', 'get', '/done/')
+
+    def login_page(self):
+        self.request('login_page', 'get', LOGIN_URL)
+
+    def signup_page(self):
+        self.request('signup_page', 'get', '/auth/signup/')
+
+    def login(self):
+        self.request('login', 'post', LOGIN_URL, {
+            'username': self.username, 'password': self.password,
+        })
+
+    def relogin(self):
+        self.request('logout', 'get', '/auth/logout/')
+        self.login()
+
+
+def run_user(number, username, password, actions, seed):
+    from django.db import connections
+
+    from notes.models import Note
+
+    try:
+        notes = list(
+            Note.objects.filter(author__username=username).values_list(
+                'id', 'slug'
+            )
+        )
+        user = VirtualUser(
+            number, username, password, notes, random.Random(seed + number)
+        )
+        for action in actions:
+            user.run(action)
+        return user.samples, user.errors
+    finally:
+        connections.close_all()
+
+
+def build_report(results, elapsed):
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    for user_samples, user_errors in results:
+        for action, values in user_samples.items():
+            samples[action].extend(values)
+        for action, count in user_errors.items():
+            errors[action] += count
+    everything = [value for values in samples.values() for value in values]
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'requests': len(everything),
+        'requests_per_second': round(len(everything) / elapsed, 1),
+        'errors': sum(errors.values()),
+        'latency': summarize(everything),
+        'actions': {
+            action: {
+                'requests': len(values),
+                'errors': errors[action],
+                'latency': summarize(values),
+            }
+            for action, values in sorted(samples.items())
+        },
+    }
+
+
+def run_load(usernames, password, requests, concurrency, seed,
+             actions=ACTIONS):
+    """Прогоняет смесь actions в concurrency потоках и возвращает сводку.
+
+    Поток с номером n работает от имени usernames[n % len(usernames)].
+    """
+    rng = random.Random(seed)
+    plans = [
+        rng.choices(list(actions), list(actions.values()),
+                    k=requests // concurrency)
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            run_user,
+            range(concurrency),
+            [usernames[number % len(usernames)]
+             for number in range(concurrency)],
+            [password] * concurrency,
+            plans,
+            [seed] * concurrency,
+        ))
+    return build_report(results, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--notes-per-user', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    from notes.seeding import SEED_PASSWORD
+
+    with bench_database() as connection:
+        seed_notes(
+            connection, args.users * args.notes_per_user, args.users
+        )
+        result = run_load(
+            [f'seed-{number}' for number in range(args.users)],
+            SEED_PASSWORD, args.requests, args.concurrency, args.seed,
+        )
+        report = {
+            'vendor': connection.vendor,
+            'users': args.users,
+            'notes': args.users * args.notes_per_user,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'settings': {
+                'fragment_cache': settings.NOTES_FRAGMENT_CACHE,
+                'page_size': settings.NOTES_PAGE_SIZE,
+            },
+            **result,
+        }
+
+    print(f'{report["requests"]} запросов: '
+          f'{report["requests_per_second"]} rps, '
+          f'p50 {report["latency"]["median_ms"]} ms, '
+          f'p99 {report["latency"]["p99_ms"]} ms, '
+          f'ошибок {report["errors"]}')
+    for action, result in report['actions'].items():
+        print(f'  {action}: {result["requests"]}, '
+              f'p50 {result["latency"]["median_ms"]} ms, '
+              f'p99 {result["latency"]["p99_ms"]} ms, '
+              f'ошибок {result["errors"]}')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Скорость полнотекстового поиска по заметкам.
+
+Пример запуска::
+
+    python -m benchmarks.search --notes 1000000 --users 100
+
+Тексты заметок собираются из синтетического словаря с частотами
+по закону Ципфа, запросы — случайные слова из него. Для сравнения
+те же запросы выполняются через icontains без индекса.
+"""
+import argparse
+import random
+
+from benchmarks.utils import (bench_database, measure, seed_notes,
+                              setup_django, summarize, write_report)
+
+SYLLABLES = ('ка', 'ро', 'ми', 'ле', 'ту', 'на', 'зо', 'ви', 'сэ', 'бу')
+WORDS_PER_NOTE = 30
+PAGE_SIZE = 50
+TARGET_MS = 50
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--baseline-queries', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    def text(index):
+        return ' '.join(rng.choices(vocabulary, weights, k=WORDS_PER_NOTE))
+
+    setup_django()
+    from notes.models import Note
+    from notes.search import search_note_ids
+
+    with bench_database() as connection:
+        author_id = seed_notes(connection, args.notes, args.users, text)[0]
+        queries = iter(rng.choices(vocabulary, k=args.queries))
+        indexed = measure(
+            lambda: search_note_ids(author_id, next(queries), PAGE_SIZE),
+            args.queries,
+        )
+        queries = iter(rng.choices(vocabulary, k=args.baseline_queries))
+        scanned = measure(
+            lambda: list(Note.objects.filter(
+                author_id=author_id, text__icontains=next(queries)
+            ).values_list('id', flat=True)[:PAGE_SIZE]),
+            args.baseline_queries,
+        )
+        report = {
+            'vendor': connection.vendor,
+            'notes': args.notes,
+            'users': args.users,
+            'search_index': summarize(indexed),
+            'icontains_scan': summarize(scanned),
+        }
+
+    for name in ('search_index', 'icontains_scan'):
+        timings = report[name]
+        print(f'{name}: median {timings["median_ms"]} ms, '
+              f'p99 {timings["p99_ms"]} ms')
+    verdict = 'OK' if report['search_index']['p99_ms'] < TARGET_MS else 'SLOW'
+    print(f'p99 поиска против цели {TARGET_MS} ms: {verdict}')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
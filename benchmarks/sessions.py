@@ -0,0 +1,116 @@
+"""Запросы к базе и задержки страниц при разном хранении сессий.
+
+Пример запуска::
+
+    python -m benchmarks.sessions --requests 2000 --output sessions.json
+
+Для каждого режима из settings.NOTES_SESSION_ENGINES — с кэшем
+пользователя сессии и без него — автор запрашивает список и свои
+заметки через тестовый клиент в том же процессе. В отчёте — SQL-запросов
+на страницу, сколько запросов сэкономлено относительно db без кэша
+пользователя, и задержки.
+"""
+import argparse
+import time
+from contextlib import contextmanager
+
+from benchmarks.utils import (bench_database, seed_notes, setup_django,
+                              summarize, write_report)
+
+CACHED_BACKENDS = [
+    'notes.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+MODEL_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+
+
+@contextmanager
+def count_queries(connection):
+    counter = {'queries': 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter['queries'] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+def run_mode(connection, author, paths, engine, user_cache):
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+
+    backends = CACHED_BACKENDS if user_cache else MODEL_BACKENDS
+    with override_settings(SESSION_ENGINE=engine,
+                           AUTHENTICATION_BACKENDS=backends):
+        cache.clear()
+        client = Client()
+        client.force_login(author)
+        # Прогрев: первая страница заполняет кэши.
+        client.get(paths[0])
+        latencies = []
+        with count_queries(connection) as counter:
+            for path in paths:
+                started = time.perf_counter()
+                client.get(path)
+                latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        'queries_per_request': round(counter['queries'] / len(paths), 3),
+        'latency': summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from notes.models import Note
+
+    with bench_database() as connection:
+        author_id = seed_notes(connection, args.notes, args.users)[0]
+        author = get_user_model().objects.get(pk=author_id)
+        slugs = list(
+            Note.objects.filter(author=author).values_list('slug', flat=True)
+        )
+        paths = [
+            '/notes/' if index % 2 else f'/note/{slugs[index % len(slugs)]}/'
+            for index in range(args.requests)
+        ]
+        modes = {}
+        for mode, engine in settings.NOTES_SESSION_ENGINES.items():
+            for user_cache in (False, True):
+                name = f'{mode}+user_cache' if user_cache else mode
+                modes[name] = run_mode(
+                    connection, author, paths, engine, user_cache
+                )
+        baseline = modes['db']['queries_per_request']
+        for result in modes.values():
+            result['queries_saved_per_request'] = round(
+                baseline - result['queries_per_request'], 3
+            )
+        report = {
+            'vendor': connection.vendor,
+            'requests': args.requests,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'modes': modes,
+        }
+
+    for name, result in report['modes'].items():
+        print(f'{name}: {result["queries_per_request"]} запросов '
+              f'(-{result["queries_saved_per_request"]}), '
+              f'p50 {result["latency"]["median_ms"]} ms, '
+              f'p99 {result["latency"]["p99_ms"]} ms')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Запись под нагрузкой: SQLite по умолчанию и профиль для продакшена.
+
+Пример запуска::
+
+    python -m benchmarks.sqlite_profile --requests 4000 --concurrency 16
+
+Одна и та же смесь с большой долей записи (создание, правка
+и удаление заметок) прогоняется в --concurrency потоках дважды:
+с настройками SQLite по умолчанию (журнал DELETE, synchronous=FULL,
+новое подключение на каждый запрос) и с профилем
+NOTES_SQLITE_PRODUCTION (WAL, PRAGMA из settings, постоянные
+подключения и WriteLockMiddleware). В отчёте — пропускная
+способность, задержки и число ошибок: «database is locked», ответы
+4xx/5xx и запросы, отправленные на вход из-за несостоявшегося входа.
+Быстрые неудачные ответы завышают rps профиля по умолчанию, поэтому
+сравнивать профили нужно вместе с числом ошибок.
+"""
+import argparse
+
+from benchmarks.load import run_load
+from benchmarks.utils import (bench_database, seed_notes, setup_django,
+                              write_report)
+
+WRITE_HEAVY = {
+    'create': 30,
+    'edit': 30,
+    'delete': 10,
+    'detail': 15,
+    'list': 15,
+}
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def run_profile(connection, production, usernames, args):
+    from django.conf import settings
+    from django.db import connections
+    from django.test import override_settings
+
+    from notes.seeding import SEED_PASSWORD
+
+    middleware = list(settings.MIDDLEWARE)
+    if production:
+        pragmas = settings.NOTES_SQLITE_PRODUCTION_PRAGMAS
+        middleware.insert(0, 'notes.sqlite.WriteLockMiddleware')
+    else:
+        pragmas = DEFAULT_PRAGMAS
+    # Режим журнала меняется, только когда к базе нет других подключений.
+    connections.close_all()
+    connection.settings_dict['CONN_MAX_AGE'] = 600 if production else 0
+    connection.settings_dict['OPTIONS'] = {'timeout': 20} if production else {}
+    with override_settings(NOTES_SQLITE_PRAGMAS=pragmas,
+                           MIDDLEWARE=middleware):
+        result = run_load(
+            usernames, SEED_PASSWORD, args.requests, args.concurrency,
+            args.seed, WRITE_HEAVY,
+        )
+    connections.close_all()
+    return {'pragmas': pragmas, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--notes-per-user', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    with bench_database() as connection:
+        if connection.vendor != 'sqlite':
+            parser.error('Сравнение имеет смысл только для SQLite.')
+        seed_notes(
+            connection, args.users * args.notes_per_user, args.users
+        )
+        usernames = [f'seed-{number}' for number in range(args.users)]
+        report = {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'default': run_profile(connection, False, usernames, args),
+            'production': run_profile(connection, True, usernames, args),
+        }
+
+    for profile in ('default', 'production'):
+        result = report[profile]
+        print(f'{profile}: {result["requests_per_second"]} rps, '
+              f'p50 {result["latency"]["median_ms"]} ms, '
+              f'p99 {result["latency"]["p99_ms"]} ms, '
+              f'ошибок {result["errors"]}')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
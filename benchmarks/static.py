@@ -0,0 +1,126 @@
+"""Статика админки: имена без хэша против хэшей, сжатия и immutable.
+
+Пример запуска::
+
+    python -m benchmarks.static --views 20 --interval 300 \\
+        --output static.json
+
+Статика собирается collectstatic дважды во временные каталоги:
+обычным хранилищем и CompressedManifestStaticFilesStorage. Со страницы
+входа в админку берутся адреса CSS и JS, после чего браузер с кэшем
+--views раз открывает страницу с промежутком --interval секунд и
+загружает её статику через StaticFilesApp. Браузер не обращается
+к серверу, пока ответ свежий (max-age, immutable), а затем
+переспрашивает его с If-None-Match. В отчёте — запросов и байт
+на просмотр страницы и время сервера на файл.
+"""
+import argparse
+import re
+import tempfile
+import time
+
+from benchmarks.utils import setup_django, summarize, write_report
+
+STORAGES = {
+    'unhashed': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    'hashed': 'notes.staticfiles.CompressedManifestStaticFilesStorage',
+}
+ASSET_RE = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+
+class Browser:
+    """Кэш браузера: URL -> (ETag, момент, до которого ответ свежий)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.cache = {}
+        self.samples = []
+        self.statuses = []
+
+    def fetch(self, url, now):
+        cached = self.cache.get(url)
+        if cached is not None and now < cached[1]:
+            return 0
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url,
+            'HTTP_ACCEPT_ENCODING': 'gzip, br',
+        }
+        if cached is not None:
+            environ['HTTP_IF_NONE_MATCH'] = cached[0]
+        response = {}
+
+        def start_response(status, headers):
+            response.update(status=status, headers=dict(headers))
+
+        started = time.perf_counter()
+        size = sum(len(block) for block in self.app(environ, start_response))
+        self.samples.append((time.perf_counter() - started) * 1000)
+        self.statuses.append(response['status'][:3])
+        max_age = int(re.search(
+            r'max-age=(\d+)', response['headers']['Cache-Control']
+        ).group(1))
+        self.cache[url] = (response['headers']['ETag'], now + max_age)
+        return size
+
+
+def run_mode(storage, views, interval):
+    from django.core.management import call_command
+    from django.test import Client, override_settings
+
+    from notes.staticfiles import StaticFilesApp
+
+    with tempfile.TemporaryDirectory() as root, override_settings(
+            STATIC_ROOT=root, STATICFILES_STORAGE=storage):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        page = Client().get('/admin/login/').content.decode()
+        assets = sorted(set(ASSET_RE.findall(page)))
+        browser = Browser(StaticFilesApp(None, root=root))
+        transferred = [
+            sum(browser.fetch(url, view * interval) for url in assets)
+            for view in range(views)
+        ]
+    repeat_requests = len(browser.statuses) - len(assets)
+    return {
+        'assets': len(assets),
+        'repeat_view_requests': round(repeat_requests / (views - 1), 2),
+        'not_modified': browser.statuses.count('304'),
+        'first_view_bytes': transferred[0],
+        'repeat_view_bytes': round(sum(transferred[1:]) / (views - 1)),
+        'server_latency': summarize(browser.samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--views', type=int, default=20,
+                        help='Просмотров страницы, не меньше двух.')
+    parser.add_argument('--interval', type=int, default=300,
+                        help='Секунд между просмотрами страницы.')
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    report = {
+        'views': args.views,
+        'interval_s': args.interval,
+        'modes': {
+            mode: run_mode(storage, args.views, args.interval)
+            for mode, storage in STORAGES.items()
+        },
+    }
+
+    for mode, result in report['modes'].items():
+        print(f'{mode}: {result["assets"]} файлов, '
+              f'{result["repeat_view_requests"]} запросов на повторный '
+              f'просмотр '
+              f'(304: {result["not_modified"]}), '
+              f'первый просмотр {result["first_view_bytes"]} байт, '
+              f'повторный {result["repeat_view_bytes"]} байт, '
+              f'p50 {result["server_latency"]["median_ms"]} ms на файл')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
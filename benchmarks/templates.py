@@ -0,0 +1,145 @@
+"""Время отрисовки списка и заметки при разной загрузке шаблонов.
+
+Пример запуска::
+
+    python -m benchmarks.templates --repeat 2000 --output templates.json
+
+Шаблоны notes/list.html (страница из --page-size заметок) и
+notes/detail.html отрисовываются без базы и без обработки запроса:
+
+- uncached — загрузчики без кэша, как при DEBUG = True до Django 4.1:
+  каждый рендер читает и разбирает все шаблоны страницы;
+- cached_cold — первый рендер в новом процессе без прогрева: движок
+  с кэширующим загрузчиком создаётся заново на каждый замер;
+- cached_warm — кэширующий загрузчик после warm_templates();
+- jinja2 — шаблоны из каталога jinja2/, если установлен пакет jinja2.
+"""
+import argparse
+
+from benchmarks.utils import measure, setup_django, summarize, write_report
+
+BASE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def django_engine(loaders):
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    options = dict(settings.TEMPLATES[-1]['OPTIONS'], loaders=loaders)
+    return DjangoTemplates({
+        'NAME': 'bench', 'DIRS': [settings.BASE_DIR / 'templates'],
+        'APP_DIRS': False, 'OPTIONS': options,
+    })
+
+
+def cached_engine():
+    return django_engine([('django.template.loaders.cached.Loader',
+                           BASE_LOADERS)])
+
+
+def jinja2_engine():
+    from django.conf import settings
+    from django.template.backends.jinja2 import Jinja2
+
+    return Jinja2({
+        'NAME': 'bench', 'DIRS': [settings.BASE_DIR / 'jinja2'],
+        'APP_DIRS': False,
+        'OPTIONS': {'environment': 'notes.jinja.environment'},
+    })
+
+
+def warm(engine):
+    from notes.warmup import template_names
+
+    for directory in engine.dirs:
+        for name in template_names(directory):
+            engine.get_template(name)
+    return engine
+
+
+def pages(page_size, text_size):
+    """Имя шаблона и контекст для списка и для заметки."""
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+
+    from notes.models import Note
+
+    request = RequestFactory().get('/notes/')
+    request.user = AnonymousUser()
+    notes = [
+        Note(id=index, title=f'Заметка {index}', slug=f'note-{index}',
+             text='Текст ' * (text_size // 6))
+        for index in range(1, page_size + 1)
+    ]
+    return request, {
+        'list': ('notes/list.html', {'object_list': notes}),
+        'detail': ('notes/detail.html', {'note': notes[0]}),
+    }
+
+
+def run_mode(make_engine, request, templates, repeat, cold=False):
+    results = {}
+    for page, (name, context) in templates.items():
+        if cold:
+            def render():
+                make_engine().get_template(name).render(context, request)
+        else:
+            template = make_engine().get_template(name)
+
+            def render():
+                template.render(context, request)
+        results[page] = summarize(measure(render, repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=1000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--text-size', type=int, default=2000)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    request, templates = pages(args.page_size, args.text_size)
+    modes = {
+        'uncached': run_mode(
+            lambda: django_engine(BASE_LOADERS), request, templates,
+            args.repeat,
+        ),
+        'cached_cold': run_mode(
+            cached_engine, request, templates, args.repeat, cold=True
+        ),
+        'cached_warm': run_mode(
+            lambda: warm(cached_engine()), request, templates, args.repeat
+        ),
+    }
+    try:
+        import jinja2  # noqa: F401
+    except ImportError:
+        print('jinja2 не установлен, режим jinja2 пропущен')
+    else:
+        modes['jinja2'] = run_mode(
+            lambda: warm(jinja2_engine()), request, templates, args.repeat
+        )
+    report = {
+        'repeat': args.repeat,
+        'page_size': args.page_size,
+        'modes': modes,
+    }
+
+    for mode, results in report['modes'].items():
+        print(f'{mode}: ' + ', '.join(
+            f'{page} p50 {result["median_ms"]} ms, '
+            f'p99 {result["p99_ms"]} ms'
+            for page, result in results.items()
+        ))
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Цена адреса заметки на строку списка: {% url %} против note_url.
+
+Пример запуска::
+
+    python -m benchmarks.urls --rows 5000 --repeat 50 --output urls.json
+
+Измеряется построение адреса notes:detail для --rows заметок функцией
+reverse() и функцией из notes.links.slug_url(), а также отрисовка
+списка из тех же заметок шаблоном с {% url %} и с {% note_url %}. База не нужна:
+заметки создаются в памяти. В отчёте — медианы и стоимость одной
+строки в микросекундах.
+"""
+import argparse
+
+from benchmarks.utils import measure, setup_django, summarize, write_report
+
+ROW = '<a href="{}"> {{{{ note.title }}}}</a>'
+LIST_TEMPLATE = (
+    '{{% load notes_urls %}}{{% for note in object_list %}}'
+    + ROW + '{{% endfor %}}'
+)
+
+
+def per_row(samples, rows):
+    return round(summarize(samples)['median_ms'] * 1000 / rows, 3)
+
+
+def run(func, rows, repeat):
+    samples = measure(func, repeat)
+    return {
+        'latency': summarize(samples),
+        'per_row_us': per_row(samples, rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='Путь к JSON-отчёту.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.template import engines
+    from django.urls import reverse
+
+    from notes.links import slug_url
+    from notes.models import Note
+
+    notes = [
+        Note(id=index, title=f'Заметка {index}', slug=f'note-{index}')
+        for index in range(args.rows)
+    ]
+    engine = engines['django']
+    url_list = engine.from_string(
+        LIST_TEMPLATE.format("{% url 'notes:detail' note.slug %}")
+    )
+    note_url_list = engine.from_string(
+        LIST_TEMPLATE.format("{% note_url 'notes:detail' note.slug %}")
+    )
+    build = slug_url('notes:detail')
+    context = {'object_list': notes}
+    assert url_list.render(context) == note_url_list.render(context)
+
+    results = {
+        'reverse': run(lambda: [
+            reverse('notes:detail', args=(note.slug,)) for note in notes
+        ], args.rows, args.repeat),
+        'slug_url': run(
+            lambda: [build(note.slug) for note in notes],
+            args.rows, args.repeat,
+        ),
+        'render_url_tag': run(
+            lambda: url_list.render(context), args.rows, args.repeat
+        ),
+        'render_note_url_tag': run(
+            lambda: note_url_list.render(context), args.rows, args.repeat
+        ),
+    }
+    report = {'rows': args.rows, 'repeat': args.repeat, 'results': results}
+
+    for name, result in results.items():
+        print(f'{name}: p50 {result["latency"]["median_ms"]} ms, '
+              f'{result["per_row_us"]} мкс на строку')
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Общие помощники для скриптов из каталога benchmarks.
+
+Скрипты запускаются из корня проекта: ``python -m benchmarks.<имя>``.
+Все измерения выполняются на отдельной тестовой базе, рабочая
+база из settings.DATABASES не затрагивается. Для PostgreSQL достаточно
+указать в DJANGO_SETTINGS_MODULE модуль настроек с нужным ENGINE.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def bench_database():
+    """Создаёт отдельную базу с применёнными миграциями и удаляет её."""
+    from django.db import connection
+
+    if connection.vendor == 'sqlite':
+        # Тестовая база SQLite по умолчанию живёт в памяти; для честных
+        # замеров на миллионах строк кладём её в файл.
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            tempfile.gettempdir(), 'yanote_bench.sqlite3'
+        )
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed_notes(connection, notes_count, users_count, text=None):
+    """Наполняет базу так же, как команда seed_notes.
+
+    Возвращает id пользователей; заметки распределены между ними
+    по кругу. text(index) задаёт текст заметки.
+    """
+    from notes import seeding
+
+    return seeding.seed_notes(
+        users_count, notes_count, text=text or seeding.default_text,
+        using=connection.alias,
+    )
+
+
+def measure(func, repeat):
+    """Вызывает func repeat раз и возвращает длительности в миллисекундах."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Сводка по длительностям: медиана и хвосты распределения."""
+    return {
+        'count': len(samples),
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(percentile(samples, 0.95), 3),
+        'p99_ms': round(percentile(samples, 0.99), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def write_report(path, report):
+    """Сохраняет отчёт в JSON, чтобы прогоны можно было сравнивать."""
+    with open(path, 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
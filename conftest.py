@@ -1,4 +1,10 @@
+import os
+import subprocess
+import sys
+
 import pytest
+from django.conf import settings as django_settings
+from django.core.cache import cache
 
 # Импортируем модель заметки, чтобы создать экземпляр.
 from notes.models import Note
@@ -46,3 +52,56 @@ def form_data():
         'text': 'Новый текст',
         'slug': 'new-slug'
     }
+
+
+@pytest.fixture
+def many_notes(author):
+    """Создаем несколько заметок Автора одним запросом"""
+    return Note.objects.bulk_create(
+        Note(
+            title=f'Заголовок {index}',
+            text='Текст заметки',
+            slug=f'slug-{index}',
+            author=author,
+        )
+        for index in range(5)
+    )
+
+
+@pytest.fixture
+def fragment_cache(settings):
+    """Включаем кэш фрагментов и начинаем с пустого кэша"""
+    settings.NOTES_FRAGMENT_CACHE = True
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def metrics_enabled(settings):
+    """Включаем MetricsMiddleware и начинаем с пустых гистограмм"""
+    from notes.metrics import REGISTRY
+
+    settings.NOTES_METRICS = True
+    # В тестах один процесс: LocMemCache для него общий.
+    settings.NOTES_SHARED_CACHE = True
+    middleware = 'notes.metrics.MetricsMiddleware'
+    if middleware not in settings.MIDDLEWARE:
+        settings.MIDDLEWARE = [middleware, *settings.MIDDLEWARE]
+    cache.clear()
+    REGISTRY.histograms.clear()
+    yield REGISTRY
+    cache.clear()
+
+
+@pytest.fixture
+def manage_check():
+    """Запуск manage.py check в отдельном процессе с переменными env"""
+    def run(**env):
+        environ = {**os.environ, **env}
+        environ.pop('NOTES_REDIS_URL', None)
+        return subprocess.run(
+            [sys.executable, 'manage.py', 'check'], env=environ,
+            cwd=django_settings.BASE_DIR, capture_output=True, text=True,
+        )
+    return run
@@ -1,5 +1,148 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.html import format_html
 
 from .models import Note
+from .pagination import EstimatedCountPaginator
+from .signals import save_changes
 
-admin.site.register(Note)
+# Поля заметки, которые читает список в админке.
+CHANGELIST_FIELDS = ('id', 'title', 'slug', 'author', 'author__username')
+
+
+class AuthorFilter(admin.SimpleListFilter):
+    """Фильтр по автору без выпадающего списка всех пользователей.
+
+    Предлагает только «Мои заметки» и уже выбранного автора; выбрать
+    другого можно по ссылке в колонке «Автор». Фильтр обслуживает
+    индекс (author, id).
+    """
+    title = 'автор'
+    parameter_name = 'author'
+
+    def lookups(self, request, model_admin):
+        choices = [(str(request.user.pk), 'Мои заметки')]
+        value = self.value()
+        if value and value.isdigit() and value != str(request.user.pk):
+            username = get_user_model().objects.filter(pk=value).values_list(
+                'username', flat=True
+            ).first()
+            if username is not None:
+                choices.append((value, username))
+        return choices
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(author_id=self.value())
+        return queryset
+
+
+class NoteChangeList(ChangeList):
+
+    def get_queryset(self, request):
+        # Текст и сжатый текст в списке не показываются.
+        return super().get_queryset(request).only(*CHANGELIST_FIELDS)
+
+
+def record_changes(queryset, deleted):
+    """Пары (author_id, id) заметок queryset для журнала изменений."""
+    return [
+        (author_id, pk, deleted)
+        for author_id, pk in queryset.values_list('author_id', 'id')
+    ]
+
+
+@admin.action(
+    description='Удалить выбранные заметки', permissions=['delete']
+)
+def delete_notes(modeladmin, request, queryset):
+    """Удаляет заметки одним DELETE без страницы подтверждения.
+
+    QuerySet.delete() из-за обработчиков post_delete загрузил бы каждую
+    заметку вместе со сжатым текстом и удалял бы их порциями по 100.
+    На заметки не ссылаются внешние ключи, а поисковый индекс чистят
+    триггеры базы, поэтому достаточно прочитать id и удалить строки
+    напрямую; версии авторов и журнал обновляются тем же пакетом.
+    """
+    with transaction.atomic():
+        changes = record_changes(queryset, deleted=True)
+        deleted = Note.objects.filter(
+            id__in=[pk for _, pk, _ in changes]
+        )._raw_delete(queryset.db)
+        if changes:
+            save_changes(changes)
+    modeladmin.message_user(request, f'Удалено заметок: {deleted}')
+
+
+@admin.action(
+    description='Сбросить заголовки выбранных заметок',
+    permissions=['change'],
+)
+def reset_titles(modeladmin, request, queryset):
+    """Возвращает заголовкам значение по умолчанию одним UPDATE."""
+    with transaction.atomic():
+        changes = record_changes(queryset, deleted=False)
+        queryset.update(
+            title=Note._meta.get_field('title').get_default(),
+            updated=timezone.now(),
+        )
+        # Триггер поиска переписал строки индекса по пустому столбцу
+        # text; сжатые тексты индексируются заново.
+        packed = list(
+            queryset.filter(compressed_text__isnull=False).select_related(
+                None
+            ).only('id', 'text', 'compressed_text')
+        )
+        for note in packed:
+            note.load_text()
+        Note.objects.index_packed(packed)
+        if changes:
+            save_changes(changes)
+    modeladmin.message_user(request, f'Изменено заметок: {len(changes)}')
+
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    """Админка заметок, рассчитанная на миллионы строк.
+
+    Список читает только показываемые поля вместе с автором одним
+    запросом, не считает строки всей таблицы (EstimatedCountPaginator,
+    show_full_result_count = False), ищет и фильтрует только по автору
+    через индексы. Массовые действия записывают версии авторов
+    и журнал изменений пакетом, а не на каждую заметку.
+    """
+    # Без даты изменения: её локализация в каждой строке стоит дороже
+    # всех запросов страницы.
+    list_display = ('title', 'slug', 'author_link')
+    list_select_related = ('author',)
+    list_filter = (AuthorFilter,)
+    search_fields = ('=author__username',)
+    raw_id_fields = ('author',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    actions = (delete_notes, reset_titles)
+
+    def get_changelist(self, request, **kwargs):
+        return NoteChangeList
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление загружает и удаляет заметки по одной.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_object(self, request, object_id, from_field=None):
+        note = super().get_object(request, object_id, from_field)
+        if note is not None:
+            note.load_text()
+        return note
+
+    @admin.display(description='Автор', ordering='author__username')
+    def author_link(self, note):
+        return format_html(
+            '<a href="?author={}">{}</a>',
+            note.author_id, note.author.username,
+        )
@@ -0,0 +1,287 @@
+"""JSON API заметок: пакетные операции и лента изменений.
+
+Один запрос создаёт, правит или удаляет до NOTES_API_BATCH_LIMIT
+заметок в одной транзакции. Каждая заметка проверяется NoteForm,
+а занятость slug — одним запросом на весь пакет. Ошибка в любой
+заметке отклоняет пакет целиком; ошибки возвращаются по номерам
+заметок в пакете.
+
+Лента изменений отдаёт заметки, изменённые и удалённые после курсора,
+по журналу NoteChange, так что синхронизация стоит O(изменений).
+"""
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views import generic
+
+from .forms import WARNING, NoteForm
+from .models import Note, NoteChange
+from .pagination import (MAX_ID, KeysetPaginator, decode_cursor,
+                         encode_cursor)
+from .signals import coalesce_note_changes, save_changes
+from .views import NoteBase
+
+FIELDS = ('id', 'title', 'text', 'slug')
+SUMMARY_FIELDS = ('id', 'title', 'slug')
+# Поля, которые читаются из базы для ответа с FIELDS.
+LOAD_FIELDS = (*FIELDS, 'compressed_text')
+
+
+class BatchError(Exception):
+    """Пакет отклонён; errors отдаются клиенту в теле ответа."""
+
+    def __init__(self, errors, status=400):
+        super().__init__(errors)
+        self.errors = errors
+        self.status = status
+
+
+def note_data(note, fields):
+    if 'text' in fields:
+        note.load_text()
+    return {field: getattr(note, field) for field in fields}
+
+
+class NotesApi(NoteBase, generic.View):
+    """Заметки пользователя: GET — страница списка, POST — создание,
+    PATCH — правка, DELETE — удаление пакета заметок."""
+    raise_exception = True
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except BatchError as error:
+            return JsonResponse({'errors': error.errors}, status=error.status)
+
+    def get(self, request):
+        page = KeysetPaginator(
+            self.get_queryset().only(*LOAD_FIELDS), settings.NOTES_PAGE_SIZE
+        ).get_page(request.GET)
+        return JsonResponse({
+            'notes': [note_data(note, FIELDS) for note in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+
+    def post(self, request):
+        """Создание заметок; пустой slug подбирается как в Note.save."""
+        items = self.read_batch('notes', dict)
+        forms = [
+            NoteForm(data=item, instance=self.model(author=request.user))
+            for item in items
+        ]
+        self.check_forms(forms)
+        notes = [form.instance for form in forms]
+        requested = [note.slug for note in notes]
+        # Заданные вручную slug распределяются первыми, чтобы подобранный
+        # из заголовка не занял slug, явно указанный в том же пакете.
+        Note.objects.allocate_slugs(
+            sorted(notes, key=lambda note: not note.slug)
+        )
+        self.check_errors({
+            index: {'slug': [slug + WARNING]}
+            for index, (note, slug) in enumerate(zip(notes, requested))
+            if slug and note.slug != slug
+        })
+
+        def write():
+            Note.objects.bulk_create(notes)
+            # bulk_create на SQLite не заполняет id, поэтому созданные
+            # заметки читаются по уникальным в пределах автора slug.
+            ids = dict(self.get_queryset().filter(
+                slug__in=[note.slug for note in notes]
+            ).values_list('slug', 'id'))
+            for note in notes:
+                note.pk = ids[note.slug]
+            return ids.values()
+
+        self.save_batch(write)
+        return JsonResponse(
+            {'notes': [note_data(note, SUMMARY_FIELDS) for note in notes]},
+            status=201,
+        )
+
+    def patch(self, request):
+        """Правка заметок по id; отсутствующие поля не меняются."""
+        items = self.read_batch('notes', dict)
+        ids = [item.get('id') for item in items]
+        self.check_ids(ids)
+        notes = self.get_queryset().in_bulk(ids)
+        fields = NoteForm._meta.fields
+        forms, errors = [], {}
+        for index, (pk, item) in enumerate(zip(ids, items)):
+            note = notes.get(pk)
+            if note is None:
+                errors[index] = {'id': ['Заметка не найдена.']}
+                continue
+            data = note_data(note, fields)
+            data.update(
+                (field, item[field]) for field in fields if field in item
+            )
+            # Пустой slug оставляет прежний.
+            data['slug'] = data['slug'] or note.slug
+            forms.append(NoteForm(data=data, instance=note))
+        self.check_errors(errors)
+        self.check_forms(forms)
+
+        batch = [form.instance for form in forms]
+        counts = Counter(note.slug for note in batch)
+        # Новые slug проверяются одним запросом; заметки пакета
+        # исключаются, их итоговые slug сверяются между собой.
+        renamed = [
+            form.instance for form in forms
+            if form.instance.slug != form.initial['slug']
+        ]
+        new_slugs = [note.slug for note in renamed]
+        taken = set()
+        if new_slugs:
+            taken = set(
+                self.get_queryset().filter(slug__in=new_slugs).exclude(
+                    id__in=ids
+                ).values_list('slug', flat=True)
+            )
+        seen = set()
+        for index, note in enumerate(batch):
+            if note.slug in taken or (counts[note.slug] > 1
+                                      and note.slug in seen):
+                errors[index] = {'slug': [note.slug + WARNING]}
+            seen.add(note.slug)
+        self.check_errors(errors)
+
+        now = timezone.now()
+        for note in batch:
+            note.updated = now
+        # Заметки пакета могут обменяться slug или передать его по
+        # цепочке, а уникальность проверяется на каждой строке UPDATE.
+        # Тогда переименованные заметки сначала получают временные slug
+        # с «~», который не пропускает форма, и лишь затем — итоговые.
+        swapped = set(new_slugs) & {form.initial['slug'] for form in forms}
+
+        def write():
+            if swapped:
+                Note.objects.bulk_update(
+                    [Note(pk=note.pk, slug=f'~{note.pk}') for note in renamed],
+                    ('slug',),
+                )
+            Note.objects.bulk_update(batch, (*fields, 'updated'))
+            return ids
+
+        self.save_batch(write)
+        return JsonResponse(
+            {'notes': [note_data(note, SUMMARY_FIELDS) for note in batch]}
+        )
+
+    def delete(self, request):
+        """Удаление заметок по id; чужие и несуществующие id пропускаются."""
+        ids = self.read_batch('ids', int)
+        self.check_ids(ids)
+        with transaction.atomic(), coalesce_note_changes():
+            deleted, _ = self.get_queryset().filter(id__in=ids).delete()
+        return JsonResponse({'deleted': deleted})
+
+    def read_batch(self, key, item_type):
+        """Список key из JSON-тела запроса длиной не больше лимита."""
+        try:
+            payload = json.loads(self.request.body)
+        except ValueError:
+            raise BatchError({'__all__': ['Тело запроса должно быть JSON.']})
+        items = payload.get(key) if isinstance(payload, dict) else None
+        if not isinstance(items, list) or not items:
+            raise BatchError({key: ['Ожидается непустой список.']})
+        limit = settings.NOTES_API_BATCH_LIMIT
+        if len(items) > limit:
+            raise BatchError({key: [f'Не больше {limit} элементов в пакете.']})
+        self.check_errors({
+            index: {'__all__': ['Неверный формат элемента.']}
+            for index, item in enumerate(items)
+            if not isinstance(item, item_type) or isinstance(item, bool)
+        })
+        return items
+
+    def check_ids(self, ids):
+        seen = set()
+        errors = {}
+        for index, pk in enumerate(ids):
+            if not isinstance(pk, int) or isinstance(pk, bool):
+                errors[index] = {'id': ['Ожидается целое число.']}
+            elif not 0 < pk <= MAX_ID:
+                errors[index] = {'id': ['Недопустимый id.']}
+            elif pk in seen:
+                errors[index] = {'id': ['Повтор в пакете.']}
+            else:
+                seen.add(pk)
+        self.check_errors(errors)
+
+    def check_forms(self, forms):
+        self.check_errors({
+            index: form.errors
+            for index, form in enumerate(forms) if not form.is_valid()
+        })
+
+    @staticmethod
+    def check_errors(errors):
+        if errors:
+            raise BatchError(errors)
+
+    def save_batch(self, write):
+        """Записывает пакет вместе с версией и журналом изменений.
+
+        write() сохраняет заметки и возвращает их id. Массовые запись
+        и обновление не вызывают сигналов модели, поэтому версия
+        и журнал обновляются здесь явно, в той же транзакции.
+        """
+        try:
+            with transaction.atomic():
+                author_id = self.request.user.pk
+                save_changes([(author_id, pk, False) for pk in write()])
+        except IntegrityError:
+            # Одновременная запись заняла slug после нашей проверки.
+            raise BatchError(
+                {'__all__': ['Конфликт с параллельным изменением, '
+                             'повторите запрос.']},
+                status=409,
+            )
+
+
+class NoteChanges(NoteBase, generic.View):
+    """Изменения заметок пользователя после курсора since.
+
+    В ответе — текущее состояние изменённых заметок, id удалённых
+    и курсор для следующего запроса; more говорит, что изменения
+    вернулись не все. Без since лента начинается с начала журнала.
+    """
+    raise_exception = True
+
+    def get(self, request):
+        since = request.GET.get('since')
+        since = decode_cursor(since) if since else 0
+        limit = settings.NOTES_CHANGES_PAGE_SIZE
+        changes = list(
+            NoteChange.objects.filter(
+                author=request.user, id__gt=since
+            ).order_by('id').values_list('id', 'note_id', 'deleted')[
+                :limit + 1
+            ]
+        )
+        more = len(changes) > limit
+        changes = changes[:limit]
+        # Из нескольких изменений одной заметки важно последнее.
+        latest = {note_id: deleted for _, note_id, deleted in changes}
+        notes = self.get_queryset().only(*LOAD_FIELDS).in_bulk(
+            [note_id for note_id, deleted in latest.items() if not deleted]
+        )
+        return JsonResponse({
+            'notes': [
+                note_data(notes[note_id], FIELDS)
+                for note_id in latest if note_id in notes
+            ],
+            # Заметка, изменённая в этой порции и удалённая позже,
+            # тоже считается удалённой.
+            'deleted': [note_id for note_id in latest if note_id not in notes],
+            'cursor': encode_cursor(changes[-1][0] if changes else since),
+            'more': more,
+        })
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import restore_sqlite_triggers
+        from .sqlite import apply_pragmas
+
+        post_migrate.connect(restore_sqlite_triggers, sender=self)
+        connection_created.connect(apply_pragmas)
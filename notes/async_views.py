@@ -0,0 +1,54 @@
+"""Асинхронные версии страниц чтения для запуска под ASGI.
+
+ORM в Django 3.2 синхронный, поэтому страница целиком — запросы
+сессии, пользователя и заметок вместе с отрисовкой шаблона — выполняется
+одним заданием в общем пуле DB_EXECUTOR. Поток занят только на время
+этого задания, а число одновременных подключений к базе ограничено
+размером пула (settings.NOTES_ASYNC_DB_THREADS), а не числом запросов.
+Логика страниц (пагинация, ETag, кэш фрагментов) та же, что у
+синхронных представлений.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import views
+
+DB_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.NOTES_ASYNC_DB_THREADS,
+    thread_name_prefix='notes-db',
+)
+
+
+def _run_view(view, request, args, kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def run_in_db_pool(view):
+    """Превращает синхронное представление в асинхронное."""
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            DB_EXECUTOR,
+            partial(context.run, _run_view, view, request, args, kwargs),
+        )
+
+    return async_view
+
+
+home = run_in_db_pool(views.Home.as_view())
+notes_list = run_in_db_pool(views.NotesList.as_view())
+note_detail = run_in_db_pool(views.NoteDetail.as_view())
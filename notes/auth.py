@@ -0,0 +1,31 @@
+"""Кэш пользователя сессии.
+
+Каждой странице за LoginRequiredMixin нужен пользователь, и по
+умолчанию он читается из базы на каждый запрос. CachedModelBackend
+держит его в кэше default; сигнал в notes.signals удаляет запись при
+любом изменении пользователя, в том числе при смене пароля.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f'notes:user:{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша."""
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.NOTES_USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,188 @@
+"""Сжатие ответов gzip и brotli (NOTES_COMPRESSION=1).
+
+CompressionMiddleware сжимает текстовые ответы, если клиент принимает
+сжатие: brotli, если установлен пакет brotli и клиент его принимает,
+иначе gzip. Обычный ответ короче NOTES_COMPRESSION_MIN_SIZE байт
+отдаётся как есть; потоковый ответ (список с NOTES_LIST_ROWS, заметка
+с большим текстом) сжимается по частям, и каждая часть сразу уходит
+клиенту.
+
+Страницы списка и заметки отдают ETag, который однозначно определяет
+их содержимое (версия заметок автора, страница). Сжатое тело такой
+страницы кладётся в кэш default по ключу из ETag и способа сжатия:
+повторный запрос той же страницы, например после сброса кэша браузера,
+отдаётся без повторного сжатия.
+
+Ответы, в которые попал CSRF-токен, не сжимаются: по размеру сжатой
+страницы с токеном и отражённым вводом пользователя можно подбирать
+токен (атака BREACH). Это только формы, они небольшие.
+"""
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from .middleware import AsyncCapableMiddleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+COMPRESSIBLE_TYPES = frozenset((
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+))
+
+
+def accepted_encodings(header):
+    """Способы сжатия из Accept-Encoding, кроме отвергнутых через q=0."""
+    encodings = set()
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name.strip():
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(header):
+    encodings = accepted_encodings(header)
+    if brotli is not None and BROTLI in encodings:
+        return BROTLI
+    if GZIP in encodings or '*' in encodings:
+        return GZIP
+    return None
+
+
+def compressor(encoding, level=None):
+    """Объект с методами compress(data) и flush() для потока.
+
+    level — уровень gzip или качество brotli; по умолчанию
+    NOTES_GZIP_LEVEL и NOTES_BROTLI_QUALITY.
+    """
+    if encoding == BROTLI:
+        return BrotliCompressor(level)
+    # wbits 16 + MAX_WBITS: формат gzip с нулевым временем в заголовке,
+    # одинаковые страницы сжимаются в одинаковые байты.
+    return zlib.compressobj(
+        settings.NOTES_GZIP_LEVEL if level is None else level,
+        zlib.DEFLATED,
+        16 + zlib.MAX_WBITS,
+    )
+
+
+class BrotliCompressor:
+
+    def __init__(self, quality=None):
+        self.compressor = brotli.Compressor(
+            quality=(
+                settings.NOTES_BROTLI_QUALITY if quality is None
+                else quality
+            )
+        )
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self, mode=None):
+        if mode == zlib.Z_SYNC_FLUSH:
+            return self.compressor.flush()
+        return self.compressor.finish()
+
+
+def compress(data, encoding, level=None):
+    stream = compressor(encoding, level)
+    return stream.compress(data) + stream.flush()
+
+
+def compress_stream(parts, encoding):
+    """Сжимает части потока; каждая сжатая часть отдаётся сразу."""
+    stream = compressor(encoding)
+    for part in parts:
+        data = stream.compress(part) + stream.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield stream.flush()
+
+
+def cache_key(encoding, etag):
+    return f'notes:compressed:{encoding}:{etag}'
+
+
+class CompressionMiddleware(AsyncCapableMiddleware):
+    """Сжимает ответы; должна стоять выше middleware, меняющих тело."""
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.streaming:
+            return self.process(request, response)
+        # Сжатие и кэш синхронные; цикл событий ими не занимаем.
+        return await sync_to_async(self.process)(request, response)
+
+    def process(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if (response.status_code != 200
+                or response.has_header('Content-Encoding')
+                or content_type not in COMPRESSIBLE_TYPES
+                or request.META.get('CSRF_COOKIE_USED')):
+            return response
+        # Ответ зависит от Accept-Encoding, даже если он не сжат.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        elif not self.compress_content(response, encoding):
+            return response
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Сжатое тело отличается от исходного побайтово.
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compress_content(self, response, encoding):
+        """Сжимает тело ответа; False, если сжимать не стоит."""
+        if len(response.content) < settings.NOTES_COMPRESSION_MIN_SIZE:
+            return False
+        etag = response.get('ETag')
+        key = cache_key(encoding, etag) if etag else None
+        content = cache.get(key) if key else None
+        if content is None:
+            content = compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return False
+            if key:
+                cache.set(
+                    key, content, settings.NOTES_COMPRESSION_CACHE_TIMEOUT
+                )
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        return True
@@ -1,7 +1,4 @@
-from pytils.translit import slugify
-
 from django import forms
-from django.core.exceptions import ValidationError
 
 from .models import Note
 
@@ -9,21 +6,12 @@ WARNING = ' - такой slug уже существует, придумайте
 
 
 class NoteForm(forms.ModelForm):
-    """Форма для создания или обновления заметки."""
+    """Форма для создания или обновления заметки.
+
+    Уникальность slug заранее не проверяется: пустой slug подбирает
+    Note.save, а конфликт заданного вручную обрабатывает представление.
+    """
 
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
-
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
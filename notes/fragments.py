@@ -0,0 +1,46 @@
+"""Кэш отрисованных фрагментов страниц заметок.
+
+Ключ фрагмента включает автора и версию его заметок (NotesVersion).
+Любое изменение заметки повышает версию автора, и все его фрагменты
+сразу становятся недоступны; фрагменты других пользователей не
+затрагиваются. Хранилище — кэш default из settings.CACHES.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+STATS_KEYS = {'hits': 'notes:stats:hits', 'misses': 'notes:stats:misses'}
+
+
+def make_key(kind, author_id, version, *parts):
+    return ':'.join(
+        str(part) for part in ('notes', kind, author_id, version) + parts
+    )
+
+
+def get_fragment(key):
+    fragment = cache.get(key)
+    _count('hits' if fragment is not None else 'misses')
+    return fragment
+
+
+def set_fragment(key, fragment):
+    cache.set(key, fragment, settings.NOTES_FRAGMENT_CACHE_TIMEOUT)
+
+
+def _count(name):
+    key = STATS_KEYS[name]
+    if not cache.add(key, 1, timeout=None):
+        cache.incr(key)
+
+
+def stats():
+    """Попадания, промахи и доля попаданий в кэш фрагментов."""
+    values = cache.get_many(STATS_KEYS.values())
+    hits = values.get(STATS_KEYS['hits'], 0)
+    misses = values.get(STATS_KEYS['misses'], 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
@@ -0,0 +1,38 @@
+"""Окружение Jinja2 для страниц notes (settings.NOTES_JINJA2).
+
+Шаблоны из каталога jinja2/ повторяют шаблоны notes/*.html
+DjangoTemplates; вместо тега {% url %} в них функция url(), вместо
+{% csrf_token %} — переменная csrf_input, которую добавляет сам бэкенд
+Jinja2. Адреса заметок строят note_url() и slug_url() из notes.links.
+Общие для всего сайта base.html и includes/ существуют в одном
+экземпляре, в templates/: страницы Jinja2 подключают их через
+django_include().
+"""
+from django.template.loader import get_template
+from django.urls import reverse
+from jinja2 import Environment, pass_context
+from markupsafe import Markup
+
+from notes.links import note_url, slug_url
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+@pass_context
+def django_include(context, template_name, **extra):
+    """Шаблон DjangoTemplates, отрисованный с контекстом страницы."""
+    template = get_template(template_name, using='django')
+    return Markup(template.render(
+        {**context.get_all(), **extra}, context.get('request')
+    ))
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update(
+        url=url, note_url=note_url, slug_url=slug_url,
+        django_include=django_include,
+    )
+    return env
@@ -0,0 +1,44 @@
+import csv
+import json
+
+FIELDS = ('title', 'text', 'slug', 'author')
+FORMATS = ('jsonl', 'csv')
+
+
+def guess_format(path, fmt):
+    """Формат из аргумента --format или из расширения файла."""
+    if fmt:
+        return fmt
+    if path.endswith('.csv'):
+        return 'csv'
+    return 'jsonl'
+
+
+def read_records(stream, fmt):
+    """Построчно читает записи заметок, не загружая файл целиком."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+class RecordWriter:
+    """Пишет записи заметок в поток по одной."""
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.csv_writer = csv.writer(stream)
+            self.csv_writer.writerow(FIELDS)
+
+    def write(self, values):
+        if self.fmt == 'csv':
+            self.csv_writer.writerow(values)
+        else:
+            self.stream.write(
+                json.dumps(dict(zip(FIELDS, values)), ensure_ascii=False)
+                + '\n'
+            )
@@ -0,0 +1,20 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from notes import fragments
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания, промахи и долю попаданий кэша фрагментов.'
+
+    def handle(self, *args, **options):
+        if not settings.NOTES_SHARED_CACHE:
+            # У команды свой процесс и свой LocMemCache: отчёт был бы
+            # пустым.
+            raise CommandError(
+                'Счётчики кэша фрагментов хранятся в кэше default; '
+                'прочитать их из команды можно только с NOTES_REDIS_URL.'
+            )
+        self.stdout.write(json.dumps(fragments.stats()))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from notes.models import Note
+from notes.texts import decompress
+
+from ._formats import FORMATS, RecordWriter, guess_format
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает заметки в JSONL или CSV, читая базу порциями '
+        'через iterator(chunk_size=...).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки, по умолчанию stdout.'
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--author', help='Выгрузить заметки одного автора.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        fmt = guess_format(options['path'], options['format'])
+        notes = Note.objects.order_by('id')
+        if options['author']:
+            notes = notes.filter(author__username=options['author'])
+        rows = notes.values_list(
+            'title', 'text', 'slug', 'author__username', 'compressed_text'
+        ).iterator(chunk_size=options['chunk_size'])
+        stream = (
+            self.stdout if options['path'] == '-'
+            else open(options['path'], 'w', encoding='utf-8', newline='')
+        )
+        writer = RecordWriter(stream, fmt)
+        for title, text, slug, author, compressed_text in rows:
+            if compressed_text is not None:
+                text = decompress(compressed_text)
+            writer.write((title, text, slug, author))
+        if stream is not self.stdout:
+            stream.close()
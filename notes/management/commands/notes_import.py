@@ -0,0 +1,128 @@
+import sys
+from contextlib import nullcontext
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from notes.forms import NoteForm
+from notes.models import Note, by_author_slug
+from notes.signals import save_changes
+
+from ._formats import FORMATS, guess_format, read_records
+
+User = get_user_model()
+
+NOTE_FIELDS = ('title', 'text', 'slug')
+
+# Сколько раз перераспределять slug пачки, если её вставку опередил
+# другой процесс.
+MAX_BATCH_ATTEMPTS = 3
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает заметки из JSONL или CSV пачками через bulk_create. '
+        'Поля записи: title, text, slug (необязательно) и author '
+        '(имя пользователя, можно задать общим --author). Записи, '
+        'не прошедшие проверку формы заметки, пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с заметками или - для stdin.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--author', help='Автор всех заметок файла.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fmt = guess_format(options['path'], options['format'])
+        self.author_ids = {}
+        if options['author']:
+            self.resolve_authors([options['author']])
+        # stdin закрывать нельзя: он принадлежит процессу, а не команде.
+        stream = (
+            nullcontext(sys.stdin) if options['path'] == '-'
+            else open(options['path'], encoding='utf-8', newline='')
+        )
+        self.rejected = 0
+        imported = start = 0
+        with stream as lines:
+            records = read_records(lines, fmt)
+            while True:
+                batch = list(islice(records, options['batch_size']))
+                if not batch:
+                    break
+                imported += self.import_batch(
+                    batch, options['author'], start
+                )
+                start += len(batch)
+        self.stdout.write(f'Импортировано заметок: {imported}')
+        if self.rejected:
+            self.stdout.write(f'Отклонено записей: {self.rejected}')
+
+    def import_batch(self, records, default_author, start=0):
+        """Сохраняет пачку записей; start — номер первой записи пачки."""
+        usernames = [record.get('author') or default_author
+                     for record in records]
+        self.resolve_authors(set(usernames))
+        notes = []
+        for number, (record, username) in enumerate(
+            zip(records, usernames), start + 1
+        ):
+            form = NoteForm(
+                data={field: record.get(field) or '' for field in NOTE_FIELDS},
+                instance=Note(author_id=self.author_ids[username]),
+            )
+            if form.is_valid():
+                notes.append(form.instance)
+            else:
+                self.reject(number, form.errors)
+        requested = [note.slug for note in notes]
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            Note.objects.allocate_slugs(notes)
+            try:
+                with transaction.atomic():
+                    Note.objects.bulk_create(notes)
+                    # bulk_create не отправляет сигналы: версию авторов
+                    # и журнал изменений обновляем сами.
+                    save_changes([
+                        (author_id, pk, False)
+                        for author_id, pk in Note.objects.saved_ids(notes)
+                    ])
+                break
+            except IntegrityError:
+                # Повторяем, только если параллельная запись заняла часть
+                # slug пачки; другие ошибки базы не скрываем.
+                if not Note.objects.filter(by_author_slug(notes)).exists():
+                    raise
+                for note, slug in zip(notes, requested):
+                    note.slug = slug
+        else:
+            raise CommandError(
+                'Не удалось подобрать свободные slug для пачки.'
+            )
+        return len(notes)
+
+    def reject(self, number, errors):
+        self.rejected += 1
+        for field, messages in errors.items():
+            for message in messages:
+                self.stderr.write(f'Запись {number}: {field}: {message}')
+
+    def resolve_authors(self, usernames):
+        missing = set(usernames) - set(self.author_ids)
+        if not missing:
+            return
+        if None in missing:
+            raise CommandError('У записи не указан автор, задайте --author.')
+        self.author_ids.update(
+            User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'id')
+        )
+        unknown = missing - set(self.author_ids)
+        if unknown:
+            raise CommandError(
+                'Нет пользователей: ' + ', '.join(sorted(unknown))
+            )
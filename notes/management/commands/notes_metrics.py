@@ -0,0 +1,32 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from notes import metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает гистограммы числа SQL-запросов и задержек '
+        'по представлениям, собранные MetricsMiddleware.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prometheus', action='store_true',
+            help='Вывести в текстовом формате Prometheus.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.NOTES_SHARED_CACHE:
+            # У команды свой процесс и свой LocMemCache: отчёт был бы
+            # пустым.
+            raise CommandError(
+                'Гистограммы хранятся в кэше default; '
+                'прочитать их из команды можно только с NOTES_REDIS_URL.'
+            )
+        if options['prometheus']:
+            self.stdout.write(metrics.prometheus_text(), ending='')
+        else:
+            self.stdout.write(json.dumps(metrics.report(), indent=2))
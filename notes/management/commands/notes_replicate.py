@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from notes.replicas import replicate
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует базу SQLite в реплики из NOTES_REPLICAS каждые --lag '
+        'секунд, имитируя отставание реплик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag', type=float, default=1.0,
+            help='Пауза между копированиями, в секундах.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Скопировать один раз и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.NOTES_REPLICA_DATABASES:
+            raise CommandError('Реплики не заданы, укажите NOTES_REPLICAS.')
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError(
+                'Команда копирует только файлы SQLite; реплики других '
+                'СУБД обновляет их собственная репликация.'
+            )
+        replicate()
+        while not options['once']:
+            time.sleep(options['lag'])
+            replicate()
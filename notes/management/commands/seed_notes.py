@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.seeding import SEED_PASSWORD, seed_notes
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро создаёт пользователей и их заметки для нагрузочных '
+        'тестов. У всех пользователей один пароль (--password).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--notes-per-user', type=int, default=100,
+            help='Сколько заметок создать каждому пользователю.',
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Начало имён пользователей: <prefix>-0, <prefix>-1, ...',
+        )
+        parser.add_argument('--password', default=SEED_PASSWORD)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        prefix = options['prefix']
+        if get_user_model().objects.filter(
+                username__startswith=f'{prefix}-').exists():
+            raise CommandError(
+                f'Пользователи {prefix}-* уже есть, задайте другой --prefix.'
+            )
+        user_ids = seed_notes(
+            options['users'],
+            options['users'] * options['notes_per_user'],
+            prefix=prefix,
+            password=options['password'],
+        )
+        self.stdout.write(
+            f'Создано пользователей: {len(user_ids)}, заметок: '
+            f'{options["users"] * options["notes_per_user"]}'
+        )
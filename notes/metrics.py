@@ -0,0 +1,290 @@
+"""Число SQL-запросов и задержки по представлениям.
+
+MetricsMiddleware (включается NOTES_METRICS=1) для каждого запроса
+измеряет число SQL-запросов, время в базе, время отрисовки шаблона
+и общую задержку и добавляет их в гистограммы по имени URL. Запросы
+к базе считает обёртка курсора, которая ставится на каждое подключение
+при его создании, поэтому учитываются и запросы из пула потоков
+асинхронных страниц.
+
+Гистограммы копятся в памяти процесса и раз в
+NOTES_METRICS_FLUSH_INTERVAL секунд прибавляются к счётчикам в кэше
+default. Общим для всех процессов (страницы /metrics в формате
+Prometheus и команды notes_metrics) он становится только с Redis,
+поэтому NOTES_METRICS=1 без NOTES_REDIS_URL не запускается.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+from . import fragments
+from .middleware import AsyncCapableMiddleware
+
+# Границы корзин гистограмм: число запросов и секунды.
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 50, 100)
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+METRICS = {
+    'queries': (QUERY_BUCKETS, 'SQL-запросов за запрос.'),
+    'db_seconds': (TIME_BUCKETS, 'Время выполнения SQL-запросов.'),
+    'render_seconds': (TIME_BUCKETS, 'Время отрисовки шаблона.'),
+    'duration_seconds': (TIME_BUCKETS, 'Полное время обработки запроса.'),
+}
+# Суммы времени хранятся в кэше целыми микросекундами.
+SUM_SCALE = 1000000
+VIEWS_KEY = 'notes:metrics:views'
+UNRESOLVED = '<unresolved>'
+
+_current_sample = ContextVar('metrics_sample', default=None)
+
+
+class Sample:
+    """Измерения одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_seconds = None
+
+
+def count_queries(execute, sql, params, many, context):
+    """Обёртка курсора: считает запросы и время текущего запроса."""
+    sample = _current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db_seconds += time.perf_counter() - started
+
+
+def instrument_connection(connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Последняя корзина — значения больше всех границ (+Inf).
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """Гистограммы процесса, ещё не перенесённые в кэш."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.flushed = time.monotonic()
+
+    def observe(self, view, sample, duration):
+        values = {
+            'queries': sample.queries,
+            'db_seconds': sample.db_seconds,
+            'render_seconds': sample.render_seconds,
+            'duration_seconds': duration,
+        }
+        with self.lock:
+            for metric, value in values.items():
+                if value is None:
+                    continue
+                key = (view, metric)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(METRICS[metric][0])
+                self.histograms[key].observe(value)
+
+    def flush_due(self):
+        interval = settings.NOTES_METRICS_FLUSH_INTERVAL
+        return time.monotonic() - self.flushed >= interval
+
+    def flush(self):
+        """Прибавляет накопленное к счётчикам в кэше."""
+        with self.lock:
+            histograms, self.histograms = self.histograms, {}
+            self.flushed = time.monotonic()
+        if not histograms:
+            return
+        views = {view for view, _ in histograms}
+        known = cache.get(VIEWS_KEY, [])
+        if not views.issubset(known):
+            cache.set(VIEWS_KEY, sorted(views.union(known)), timeout=None)
+        for (view, metric), histogram in histograms.items():
+            for index, count in enumerate(histogram.counts):
+                if count:
+                    _add(_key(view, metric, index), count)
+            _add(_key(view, metric, 'count'), sum(histogram.counts))
+            scale = 1 if metric == 'queries' else SUM_SCALE
+            _add(_key(view, metric, 'sum'), round(histogram.sum * scale))
+
+
+REGISTRY = Registry()
+
+
+def _key(view, metric, part):
+    return f'notes:metrics:{view}:{metric}:{part}'
+
+
+def _add(key, delta):
+    if not cache.add(key, delta, timeout=None):
+        cache.incr(key, delta)
+
+
+def report():
+    """Гистограммы всех процессов: {view: {metric: {...}}}.
+
+    Корзины накопительные, как в Prometheus: buckets[i] — число
+    значений не больше i-й границы, последняя — всех значений.
+    """
+    views = cache.get(VIEWS_KEY, [])
+    keys = [
+        _key(view, metric, part)
+        for view in views
+        for metric, (buckets, _) in METRICS.items()
+        for part in (*range(len(buckets) + 1), 'count', 'sum')
+    ]
+    values = cache.get_many(keys)
+    result = defaultdict(dict)
+    for view in views:
+        for metric, (buckets, _) in METRICS.items():
+            count = values.get(_key(view, metric, 'count'), 0)
+            if not count:
+                continue
+            cumulative, total = [], 0
+            for index in range(len(buckets) + 1):
+                total += values.get(_key(view, metric, index), 0)
+                cumulative.append(total)
+            scale = 1 if metric == 'queries' else SUM_SCALE
+            result[view][metric] = {
+                'le': [*buckets, '+Inf'],
+                'buckets': cumulative,
+                'count': count,
+                'sum': values.get(_key(view, metric, 'sum'), 0) / scale,
+            }
+    return dict(result)
+
+
+def prometheus_text():
+    """Гистограммы и статистика кэша фрагментов в формате Prometheus."""
+    lines = []
+    data = report()
+    for metric, (_, help_text) in METRICS.items():
+        name = f'notes_request_{metric}'
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for view, metrics in sorted(data.items()):
+            if metric not in metrics:
+                continue
+            histogram = metrics[metric]
+            for le, count in zip(histogram['le'], histogram['buckets']):
+                lines.append(
+                    f'{name}_bucket{{view="{view}",le="{le}"}} {count}'
+                )
+            lines.append(f'{name}_sum{{view="{view}"}} {histogram["sum"]}')
+            lines.append(
+                f'{name}_count{{view="{view}"}} {histogram["count"]}'
+            )
+    stats = fragments.stats()
+    for name in ('hits', 'misses'):
+        lines += [
+            f'# TYPE notes_fragment_cache_{name}_total counter',
+            f'notes_fragment_cache_{name}_total {stats[name]}',
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Страница /metrics для Prometheus (только при NOTES_METRICS).
+
+    Доступна сотрудникам и адресам из NOTES_METRICS_ALLOWED_IPS.
+    """
+    if not settings.NOTES_METRICS:
+        raise Http404
+    if not (request.user.is_staff or request.META.get('REMOTE_ADDR')
+            in settings.NOTES_METRICS_ALLOWED_IPS):
+        raise PermissionDenied
+    REGISTRY.flush()
+    return HttpResponse(
+        prometheus_text(), content_type='text/plain; version=0.0.4'
+    )
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Измеряет каждый запрос; должен стоять первым в MIDDLEWARE.
+
+    Работает и под WSGI, и под ASGI, не переводя асинхронные страницы
+    в синхронный режим. Время отрисовки учитывается для шаблонов,
+    которые отрисовываются после представления; асинхронные страницы
+    отрисовываются в пуле потоков, и их отрисовка входит только в общее
+    время.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        connection_created.connect(
+            instrument_connection, dispatch_uid='notes.metrics'
+        )
+        for connection in connections.all():
+            instrument_connection(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        sample, token, started = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_sample.reset(token)
+        self.finish(request, sample, started)
+        if REGISTRY.flush_due():
+            REGISTRY.flush()
+        return response
+
+    async def __acall__(self, request):
+        sample, token, started = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_sample.reset(token)
+        self.finish(request, sample, started)
+        if REGISTRY.flush_due():
+            await sync_to_async(REGISTRY.flush)()
+        return response
+
+    def start(self, request):
+        sample = Sample()
+        request.metrics_sample = sample
+        return sample, _current_sample.set(sample), time.perf_counter()
+
+    def finish(self, request, sample, started):
+        match = getattr(request, 'resolver_match', None)
+        REGISTRY.observe(
+            match.view_name if match else UNRESOLVED,
+            sample,
+            time.perf_counter() - started,
+        )
+
+    def process_template_response(self, request, response):
+        if not response.is_rendered:
+            started = time.perf_counter()
+            response.render()
+            request.metrics_sample.render_seconds = (
+                time.perf_counter() - started
+            )
+        return response
@@ -0,0 +1,18 @@
+import asyncio
+
+from django.utils.deprecation import MiddlewareMixin
+
+
+class AsyncCapableMiddleware(MiddlewareMixin):
+    """Основа middleware, работающих и под WSGI, и под ASGI.
+
+    MiddlewareMixin помечает экземпляр как корутину, если следующий
+    обработчик асинхронный, и тогда ASGI-обработчик не переводит запрос
+    в синхронный режим. Подклассы определяют __call__ для синхронного
+    пути и, если нужно, __acall__ для асинхронного; is_async говорит,
+    какой из них выбран.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.is_async = asyncio.iscoroutinefunction(get_response)
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.15 on 2026-10-18 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_author_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='note',
+            constraint=models.UniqueConstraint(fields=('author', 'slug'), name='note_author_slug_uniq'),
+        ),
+        migrations.RemoveIndex(
+            model_name='note',
+            name='note_author_slug_idx',
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='slug',
+            field=models.SlugField(blank=True, db_index=False, help_text='Укажите адрес для страницы заметки. Используйте только латиницу, цифры, дефисы и знаки подчёркивания', max_length=100, verbose_name='Адрес для страницы с заметкой'),
+        ),
+    ]
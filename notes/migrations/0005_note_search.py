@@ -0,0 +1,81 @@
+from django.db import migrations
+
+# SQL индекса записан здесь, а не взят из notes.search: миграция должна
+# создавать ту схему, которая была на момент её написания.
+SQLITE_TABLE = 'notes_note_search'
+SQLITE_INSTALL = (
+    f'CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5('
+    "title, text, owner, tokenize = 'unicode61 remove_diacritics 2')",
+    f'INSERT INTO {SQLITE_TABLE} (rowid, title, text, owner) '
+    "SELECT id, title, text, 'a' || author_id FROM notes_note",
+    f'''CREATE TRIGGER IF NOT EXISTS notes_note_search_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO {SQLITE_TABLE} (rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'a' || new.author_id);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS notes_note_search_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        UPDATE {SQLITE_TABLE}
+        SET title = new.title, text = new.text, owner = 'a' || new.author_id
+        WHERE rowid = old.id;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS notes_note_search_delete
+    AFTER DELETE ON notes_note BEGIN
+        DELETE FROM {SQLITE_TABLE} WHERE rowid = old.id;
+    END''',
+)
+SQLITE_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS notes_note_search_insert',
+    'DROP TRIGGER IF EXISTS notes_note_search_update',
+    'DROP TRIGGER IF EXISTS notes_note_search_delete',
+    f'DROP TABLE {SQLITE_TABLE}',
+)
+
+POSTGRESQL_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce({0}.title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce({0}.text, '')), 'B')"
+)
+POSTGRESQL_INSTALL = (
+    'ALTER TABLE notes_note ADD COLUMN search_vector tsvector',
+    'UPDATE notes_note SET search_vector = '
+    + POSTGRESQL_VECTOR.format('notes_note'),
+    'CREATE INDEX notes_note_search_idx ON notes_note '
+    'USING GIN (search_vector)',
+    '''CREATE FUNCTION notes_note_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := ''' + POSTGRESQL_VECTOR.format('NEW') + ''';
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql''',
+    'CREATE TRIGGER notes_note_search_vector '
+    'BEFORE INSERT OR UPDATE OF title, text ON notes_note '
+    'FOR EACH ROW EXECUTE PROCEDURE notes_note_search_vector()',
+)
+POSTGRESQL_UNINSTALL = (
+    'DROP TRIGGER notes_note_search_vector ON notes_note',
+    'DROP FUNCTION notes_note_search_vector()',
+    'ALTER TABLE notes_note DROP COLUMN search_vector',
+)
+
+INSTALL = {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRESQL_INSTALL}
+UNINSTALL = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRESQL_UNINSTALL}
+
+
+def run(statements):
+    """Функция для RunPython, выполняющая SQL для СУБД подключения."""
+    def execute(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, ()):
+            schema_editor.execute(sql)
+    return execute
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_slug_unique_per_author'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(INSTALL), run(UNINSTALL)),
+    ]
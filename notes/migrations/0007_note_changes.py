@@ -0,0 +1,43 @@
+# Generated by Django 3.2.15 on 2026-10-18 06:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def log_existing_notes(apps, schema_editor):
+    """Каждая существующая заметка попадает в журнал как изменённая,
+    чтобы синхронизация с нуля вернула все заметки."""
+    Note = apps.get_model('notes', 'Note')
+    NoteChange = apps.get_model('notes', 'NoteChange')
+    NoteChange.objects.bulk_create(
+        (NoteChange(author_id=author_id, note_id=pk)
+         for author_id, pk in Note.objects.order_by('id').values_list(
+             'author_id', 'id').iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0006_note_timestamps_notesversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('author', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notechange',
+            index=models.Index(fields=['author', 'id'], name='notechange_author_id_idx'),
+        ),
+        migrations.RunPython(log_existing_notes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 3.2.15 on 2026-10-18 06:52
+
+import zlib
+
+from django.db import migrations, models
+from django.db.models.functions import Length
+
+# Порог, уровень сжатия и SQL поискового индекса записаны здесь, а не
+# взяты из notes.texts и notes.search: миграция должна делать то же,
+# что и в момент её написания.
+COMPRESS_TEXT_OVER = 64 * 1024
+COMPRESS_LEVEL = 6
+BATCH_SIZE = 100
+REINDEX = {
+    'sqlite': 'UPDATE notes_note_search SET text = %s WHERE rowid = %s',
+    'postgresql': (
+        'UPDATE notes_note SET search_vector = '
+        "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('russian', %s), 'B') WHERE id = %s"
+    ),
+}
+
+
+def batches(queryset, ids, fields):
+    """Заметки с id из ids порциями по BATCH_SIZE.
+
+    id читаются заранее, а не через iterator(): SQLite не изолирует
+    запросы одного подключения, и UPDATE порции менял бы строки
+    открытого курсора.
+    """
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield list(
+            queryset.filter(id__in=ids[start:start + BATCH_SIZE]).only(
+                *fields
+            )
+        )
+
+
+def pack_large_texts(apps, schema_editor):
+    """Сжимает тексты существующих заметок длиннее порога."""
+    Note = apps.get_model('notes', 'Note')
+    ids = list(Note.objects.annotate(length=Length('text')).filter(
+        length__gt=COMPRESS_TEXT_OVER
+    ).values_list('id', flat=True))
+    reindex = REINDEX.get(schema_editor.connection.vendor)
+    for notes in batches(Note.objects, ids, ('id', 'text')):
+        texts = [(note.text, note.pk) for note in notes]
+        for note in notes:
+            note.compressed_text = zlib.compress(
+                note.text.encode(), COMPRESS_LEVEL
+            )
+            note.text = ''
+        Note.objects.bulk_update(notes, ('text', 'compressed_text'))
+        # Триггеры поиска проиндексировали пустой text.
+        if reindex:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(reindex, texts)
+
+
+def unpack_large_texts(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    ids = list(Note.objects.filter(
+        compressed_text__isnull=False
+    ).values_list('id', flat=True))
+    for notes in batches(Note.objects, ids, ('id', 'compressed_text')):
+        for note in notes:
+            note.text = zlib.decompress(note.compressed_text).decode()
+            note.compressed_text = None
+        Note.objects.bulk_update(notes, ('text', 'compressed_text'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_note_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='compressed_text',
+            field=models.BinaryField(null=True, verbose_name='Сжатый текст'),
+        ),
+        migrations.RunPython(pack_large_texts, unpack_large_texts),
+    ]
@@ -1,7 +1,127 @@
+from collections import defaultdict
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .slugs import (SUFFIX_RESERVE, next_free_slug, slugify_title,
+                    slugify_titles)
+from .texts import compress, decompress, is_large
+
+
+def by_author_slug(notes):
+    """Условие на заметки с теми же (author, slug), что у notes."""
+    slugs_by_author = defaultdict(set)
+    for note in notes:
+        slugs_by_author[note.author_id].add(note.slug)
+    lookup = Q()
+    for author_id, author_slugs in slugs_by_author.items():
+        lookup |= Q(author_id=author_id, slug__in=author_slugs)
+    return lookup
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def allocate_slugs(self, notes):
+        """Подбирает свободные slug для пачки несохранённых заметок.
+
+        Пустой slug строится из заголовка, занятый (в базе или другой
+        заметкой той же пачки) получает суффикс -2, -3 и т. д. На всю
+        пачку выполняется один запрос по (author, slug) и по одному
+        запросу на каждый конфликтующий slug.
+        """
+        max_length = self.model._meta.get_field('slug').max_length
+        untitled = [note for note in notes if not note.slug]
+        slugs = slugify_titles([note.title for note in untitled])
+        for note, slug in zip(untitled, slugs):
+            note.slug = slug[:max_length]
+
+        taken = defaultdict(set)
+        if notes:
+            rows = self.filter(by_author_slug(notes)).values_list(
+                'author_id', 'slug'
+            )
+            for author_id, slug in rows:
+                taken[author_id].add(slug)
+
+        loaded_prefixes = set()
+        for note in notes:
+            author_taken = taken[note.author_id]
+            if note.slug in author_taken:
+                prefix = note.slug[:max_length - SUFFIX_RESERVE]
+                if (note.author_id, prefix) not in loaded_prefixes:
+                    loaded_prefixes.add((note.author_id, prefix))
+                    author_taken |= self.taken_slugs(note.author_id, prefix)
+                note.slug = next_free_slug(note.slug, author_taken, max_length)
+            author_taken.add(note.slug)
+        return notes
+
+    def taken_slugs(self, author_id, prefix):
+        """slug заметок автора, начинающиеся с prefix."""
+        return set(
+            self.filter(
+                author_id=author_id, slug__startswith=prefix
+            ).values_list('slug', flat=True)
+        )
+
+    def saved_ids(self, notes):
+        """Пары (author_id, id) сохранённых заметок пачки.
+
+        bulk_create на SQLite не заполняет id, поэтому заметки ищутся
+        одним запросом по (author, slug).
+        """
+        if not notes:
+            return []
+        return list(
+            self.filter(by_author_slug(notes)).values_list('author_id', 'id')
+        )
 
-from pytils.translit import slugify
+    def bulk_create(self, objs, *args, **kwargs):
+        """QuerySet.bulk_create, записывающий большие тексты сжатыми."""
+        notes = list(objs)
+        texts = [note.pack_text() for note in notes]
+        try:
+            super().bulk_create(notes, *args, **kwargs)
+        finally:
+            for note, text in zip(notes, texts):
+                note.text = text
+        self.index_packed(notes)
+        return notes
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """QuerySet.bulk_update, записывающий большие тексты сжатыми."""
+        notes = list(objs)
+        if 'text' in fields:
+            fields = (*fields, 'compressed_text')
+        texts = [note.pack_text() for note in notes]
+        try:
+            rows = super().bulk_update(notes, fields, *args, **kwargs)
+        finally:
+            for note, text in zip(notes, texts):
+                note.text = text
+        self.index_packed(notes)
+        return rows
+
+    def index_packed(self, notes):
+        """Индексирует для поиска сжатые тексты записанных заметок."""
+        # search сам импортирует модели.
+        from .search import index_texts
+
+        packed = [note for note in notes if note.compressed_text is not None]
+        if not packed:
+            return
+        if any(note.pk is None for note in packed):
+            # bulk_create на SQLite не заполняет id.
+            ids = {
+                (author_id, slug): pk
+                for author_id, slug, pk in self.filter(
+                    by_author_slug(packed)
+                ).values_list('author_id', 'slug', 'id')
+            }
+            for note in packed:
+                note.pk = ids[note.author_id, note.slug]
+        index_texts([(note.pk, note.text) for note in packed], self.db)
 
 
 class Note(models.Model):
@@ -18,21 +138,192 @@ class Note(models.Model):
     slug = models.SlugField(
         'Адрес для страницы с заметкой',
         max_length=100,
-        unique=True,
         blank=True,
+        # Поиск по slug всегда идёт вместе с автором, его обслуживает
+        # индекс ограничения note_author_slug_uniq.
+        db_index=False,
         help_text=('Укажите адрес для страницы заметки. Используйте только '
                    'латиницу, цифры, дефисы и знаки подчёркивания')
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        # Отдельный индекс по автору не нужен: его заменяют составные
+        # индексы из Meta, которые начинаются с author.
+        db_index=False,
     )
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    updated = models.DateTimeField('Изменена', auto_now=True)
+    # Большой текст, сжатый zlib; text у такой заметки пустой.
+    compressed_text = models.BinaryField(
+        'Сжатый текст', null=True, editable=False
+    )
+
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            # Список заметок: фильтр по автору и курсор по id.
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+        constraints = (
+            # slug уникален в пределах заметок одного автора; индекс
+            # ограничения обслуживает и просмотр, редактирование
+            # и удаление заметки по автору и slug.
+            models.UniqueConstraint(
+                fields=('author', 'slug'), name='note_author_slug_uniq'
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    def load_text(self):
+        """Распаковывает в text сжатый текст большой заметки."""
+        if self.compressed_text is not None and not self.text:
+            self.text = decompress(self.compressed_text)
+        return self.text
+
+    def pack_text(self):
+        """Готовит текст к записи в базу и возвращает его.
+
+        Большой текст сжимается в compressed_text, а text до конца
+        записи становится пустым; у небольшого compressed_text
+        сбрасывается.
+        """
+        text = self.load_text()
+        if is_large(text):
+            self.compressed_text = compress(text)
+            self.text = ''
+        else:
+            self.compressed_text = None
+        return text
+
+    def save_base(self, *args, update_fields=None, **kwargs):
+        """Записывает заметку с большим текстом сжатым.
+
+        Если text не записывается (update_fields без него), текст
+        не сжимается и не индексируется заново.
+        """
+        # search сам импортирует модели.
+        from .search import index_texts
+
+        if update_fields is not None:
+            if 'text' not in update_fields:
+                return super().save_base(
+                    *args, update_fields=update_fields, **kwargs
+                )
+            update_fields = {*update_fields, 'compressed_text'}
+        text = self.pack_text()
+        try:
+            super().save_base(*args, update_fields=update_fields, **kwargs)
+        finally:
+            self.text = text
+        if self.compressed_text is not None:
+            index_texts([(self.pk, text)], self._state.db)
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """Сохраняет заметку, при необходимости подбирая свободный slug.
+
+        Заданный пользователем slug сохраняется как есть: конфликт
+        с другой заметкой автора приводит к IntegrityError. Пустой slug
+        строится из заголовка; если такой уже занят, к нему добавляется
+        суффикс -2, -3 и т. д. Занятость проверяется не заранее,
+        а по ошибке уникальности, поэтому одновременные сохранения
+        с одинаковым заголовком не мешают друг другу.
+        """
+        if self.slug:
+            super().save(*args, **kwargs)
+            return
+        max_slug_length = self._meta.get_field('slug').max_length
+        base_slug = slugify_title(self.title)[:max_slug_length]
+        self.slug = base_slug
+        while True:
+            try:
+                # Точка сохранения: при конфликте откатывается только
+                # эта запись, а не вся внешняя транзакция.
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                taken = self.taken_slugs(
+                    base_slug[:max_slug_length - SUFFIX_RESERVE]
+                )
+                if self.slug not in taken:
+                    raise
+                self.slug = next_free_slug(base_slug, taken, max_slug_length)
+
+    def taken_slugs(self, prefix):
+        """slug других заметок автора, начинающиеся с prefix."""
+        return Note.objects.exclude(pk=self.pk).taken_slugs(
+            self.author_id, prefix
+        )
+
+
+class NotesVersionQuerySet(models.QuerySet):
+
+    def bump(self, author_ids):
+        """Повышает версию заметок авторов одним UPDATE."""
+        return self.filter(author_id__in=author_ids).update(
+            version=F('version') + 1, updated=timezone.now()
+        )
+
+
+class NotesVersion(models.Model):
+    """Версия заметок автора: растёт при любом изменении его заметок.
+
+    По ней строятся ETag и ключи кэша страниц автора, так что проверить
+    их свежесть можно одним запросом по первичному ключу.
+    """
+    author = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notes_version',
+    )
+    version = models.PositiveBigIntegerField(default=1)
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = NotesVersionQuerySet.as_manager()
+
+
+class NoteChangeQuerySet(models.QuerySet):
+
+    def record(self, changes):
+        """Записывает изменения (author_id, note_id, deleted) одним INSERT.
+
+        Вызывать после повышения версий авторов в той же транзакции:
+        блокировка строки версии упорядочивает записи журнала одного
+        автора так же, как фиксируются транзакции.
+        """
+        return self.bulk_create(
+            NoteChange(author_id=author_id, note_id=note_id, deleted=deleted)
+            for author_id, note_id, deleted in changes
+        )
+
+
+class NoteChange(models.Model):
+    """Запись журнала изменений заметок для синхронизации клиентов.
+
+    id записи служит курсором ленты изменений: клиент получает записи
+    автора с id больше известного ему. Удаление оставляет запись
+    с deleted=True, поэтому note_id — не внешний ключ.
+    """
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        # Индекс (author, id) из Meta обслуживает и внешний ключ.
+        db_index=False,
+    )
+    note_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+
+    objects = NoteChangeQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            # Лента изменений: фильтр по автору и курсор по id.
+            models.Index(
+                fields=('author', 'id'), name='notechange_author_id_idx'
+            ),
+        )
@@ -0,0 +1,215 @@
+from itertools import islice
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import Http404
+from django.utils.functional import cached_property
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+AFTER = 'after'
+BEFORE = 'before'
+# Наибольшее значение bigint: id больше этого база не примет.
+MAX_ID = 2 ** 63 - 1
+
+
+def encode_cursor(pk):
+    """Превращает id заметки или записи журнала в токен для URL."""
+    return urlsafe_base64_encode(force_bytes(pk))
+
+
+def decode_cursor(token):
+    """Восстанавливает id из токена; на мусор отвечает 404."""
+    try:
+        pk = int(force_str(urlsafe_base64_decode(token)))
+    except (TypeError, ValueError):
+        pk = None
+    if pk is None or not 0 <= pk <= MAX_ID:
+        raise Http404('Некорректный курсор страницы.')
+    return pk
+
+
+class KeysetPage:
+    """Страница курсорной пагинации."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def chunks(self, size):
+        """Строки страницы списками не длиннее size."""
+        for start in range(0, len(self.object_list), size):
+            yield self.object_list[start:start + size]
+
+
+class StreamingKeysetPage(KeysetPage):
+    """Страница «вперёд», строки которой читаются из базы по мере отдачи.
+
+    rows — итератор не более чем per_page + 1 строк по возрастанию id.
+    Курсоры известны только после того, как chunks() исчерпан; до этого
+    has_next() и has_previous() ложны.
+    """
+
+    def __init__(self, rows, per_page, after):
+        super().__init__(())
+        self.rows = rows
+        self.per_page = per_page
+        self.after = after
+
+    def chunks(self, size):
+        rows = iter(self.rows)
+        taken = 0
+        last = None
+        while taken < self.per_page:
+            chunk = list(islice(rows, min(size, self.per_page - taken)))
+            if not chunk:
+                break
+            if last is None and self.after is not None:
+                self.previous_cursor = encode_cursor(chunk[0].id)
+            taken += len(chunk)
+            last = chunk[-1]
+            yield chunk
+        if next(rows, None) is not None:
+            self.next_cursor = encode_cursor(last.id)
+
+
+class KeysetPaginator:
+    """Курсорный пагинатор по ключу (author_id, id).
+
+    Queryset уже отфильтрован по автору, поэтому страница выбирается
+    условием id > курсор (или id < курсор для движения назад) и LIMIT.
+    Строки — модели или именованные кортежи values_list(named=True),
+    курсор берётся из поля id.
+    В отличие от django.core.paginator.Paginator не нужны ни COUNT(*),
+    ни OFFSET: стоимость страницы не зависит от числа заметок у автора.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def get_page(self, params):
+        """Возвращает страницу по параметрам запроса after/before."""
+        before = params.get(BEFORE)
+        if before:
+            return self._page_before(decode_cursor(before))
+        after = params.get(AFTER)
+        if after:
+            return self._page_after(decode_cursor(after))
+        return self._page_after(None)
+
+    def stream_page(self, params, chunk_size):
+        """Как get_page(), но строки страницы «вперёд» не загружаются
+        заранее, а читаются итератором частями по chunk_size."""
+        if params.get(BEFORE):
+            # Страница «назад» читается в обратном порядке, её нужно
+            # развернуть целиком; она не длиннее per_page строк.
+            return self.get_page(params)
+        after = params.get(AFTER)
+        pk = decode_cursor(after) if after else None
+        queryset = self.queryset
+        if pk is not None:
+            queryset = queryset.filter(id__gt=pk)
+        # База выбирается сейчас: строки читаются уже после выхода из
+        # представления, когда маршрут реплик запроса сброшен.
+        queryset = queryset.using(queryset.db).order_by('id')
+        return StreamingKeysetPage(
+            queryset[:self.per_page + 1].iterator(chunk_size),
+            self.per_page,
+            pk,
+        )
+
+    def _page_after(self, pk):
+        queryset = self.queryset
+        if pk is not None:
+            queryset = queryset.filter(id__gt=pk)
+        # Берём на одну запись больше, чтобы узнать, есть ли следующая
+        # страница, не делая отдельного запроса.
+        notes = list(queryset.order_by('id')[:self.per_page + 1])
+        has_next = len(notes) > self.per_page
+        notes = notes[:self.per_page]
+        return KeysetPage(
+            notes,
+            next_cursor=encode_cursor(notes[-1].id) if has_next else None,
+            previous_cursor=(
+                encode_cursor(notes[0].id) if pk is not None and notes
+                else None
+            ),
+        )
+
+    def _page_before(self, pk):
+        notes = list(
+            self.queryset.filter(id__lt=pk).order_by('-id')[:self.per_page + 1]
+        )
+        has_previous = len(notes) > self.per_page
+        notes = notes[:self.per_page][::-1]
+        return KeysetPage(
+            notes,
+            next_cursor=encode_cursor(notes[-1].id) if notes else None,
+            previous_cursor=(
+                encode_cursor(notes[0].id) if has_previous else None
+            ),
+        )
+
+
+def estimate_count(model, using):
+    """Число строк таблицы модели по статистике СУБД или None.
+
+    На SQLite статистику собирает ANALYZE (sqlite_stat1), на PostgreSQL —
+    autovacuum (pg_class.reltuples). Оценка не требует чтения таблицы.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            if 'sqlite_stat1' not in connection.introspection.table_names(
+                    cursor):
+                return None
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table]
+            )
+            counts = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+            return max(counts, default=None)
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(table)],
+            )
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] >= 0 else None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который не считает строки всей таблицы.
+
+    Для queryset без фильтров число строк берётся из статистики СУБД
+    (estimate_count), если она есть и оценка не меньше exact_count_under;
+    отфильтрованные queryset и небольшие таблицы считаются COUNT(*).
+    """
+    exact_count_under = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.exact_count_under:
+                return estimate
+        return super().count
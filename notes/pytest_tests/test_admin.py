@@ -0,0 +1,132 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note, NoteChange, NotesVersion
+from notes.pagination import EstimatedCountPaginator
+from notes.search import search_note_ids
+
+CHANGELIST_URL = reverse('admin:notes_note_changelist')
+
+
+def create_notes(author, count, start=0):
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст', slug=f'note-{index}',
+             author=author)
+        for index in range(start, start + count)
+    )
+
+
+def changelist_queries(client, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(CHANGELIST_URL, params)
+    assert response.status_code == HTTPStatus.OK
+    return [query['sql'] for query in queries]
+
+
+def test_changelist_queries_do_not_grow(author, admin_client):
+    """Число запросов списка не зависит от числа заметок, текст
+    не читается"""
+    create_notes(author, 3)
+    few = changelist_queries(admin_client)
+    create_notes(author, 30, start=3)
+    many = changelist_queries(admin_client)
+    assert len(few) == len(many)
+    assert not any('"text"' in sql for sql in many)
+
+
+def test_changelist_filters_by_author(author, admin_user, admin_client):
+    create_notes(author, 2)
+    Note.objects.create(title='Админ', text='Текст', author=admin_user)
+    response = admin_client.get(CHANGELIST_URL, {'author': author.pk})
+    assert response.context['cl'].result_count == 2
+    assert author.username in response.content.decode()
+    response = admin_client.get(CHANGELIST_URL, {'q': author.username})
+    assert response.context['cl'].result_count == 2
+
+
+def test_estimated_count(author, monkeypatch):
+    """Без фильтров число строк берётся из статистики SQLite"""
+    create_notes(author, 5)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    create_notes(author, 2, start=5)
+    monkeypatch.setattr(EstimatedCountPaginator, 'exact_count_under', 1)
+    assert EstimatedCountPaginator(Note.objects.order_by('id'), 10).count == 5
+    assert EstimatedCountPaginator(
+        Note.objects.filter(author=author).order_by('id'), 10
+    ).count == 7
+
+
+def run_action(client, action, notes):
+    with CaptureQueriesContext(connection) as queries:
+        client.post(CHANGELIST_URL, {
+            'action': action,
+            '_selected_action': [note.pk for note in notes],
+        })
+    return [query['sql'] for query in queries]
+
+
+def test_delete_action(author, admin_client):
+    """Удаление — один DELETE, журнал и версия обновлены пакетом"""
+    # Больше 100 заметок: QuerySet.delete() удалял бы их порциями.
+    create_notes(author, 151)
+    version = NotesVersion.objects.get(author=author).version
+    notes = list(Note.objects.order_by('id')[:150])
+    queries = run_action(admin_client, 'delete_notes', notes)
+    assert sum(
+        sql.startswith('DELETE FROM "notes_note"') for sql in queries
+    ) == 1
+    assert not any('"compressed_text"' in sql for sql in queries)
+    assert Note.objects.count() == 1
+    assert NotesVersion.objects.get(author=author).version == version + 1
+    assert set(NoteChange.objects.filter(deleted=True).values_list(
+        'note_id', flat=True
+    )) == {note.pk for note in notes}
+
+
+def test_reset_titles_action(author, admin_client, settings):
+    """Сброс заголовков — один UPDATE, сжатый текст остаётся в поиске"""
+    settings.NOTES_COMPRESS_TEXT_OVER = 10
+    note = Note.objects.create(
+        title='Лог', text='Очень длинный журнал', slug='log', author=author
+    )
+    queries = run_action(admin_client, 'reset_titles', [note])
+    assert sum(
+        sql.startswith('UPDATE "notes_note"') for sql in queries
+    ) == 1
+    note = Note.objects.get(pk=note.pk)
+    assert note.title == 'Название заметки'
+    assert note.load_text() == 'Очень длинный журнал'
+    assert search_note_ids(author.pk, 'журнал', 10) == [note.pk]
+
+
+def test_change_form_shows_packed_text(author, admin_client, settings):
+    settings.NOTES_COMPRESS_TEXT_OVER = 10
+    note = Note.objects.create(
+        title='Лог', text='Очень длинный журнал', slug='log', author=author
+    )
+    response = admin_client.get(
+        reverse('admin:notes_note_change', args=(note.pk,))
+    )
+    assert response.context['adminform'].form.initial['text'] == (
+        'Очень длинный журнал'
+    )
+
+
+@pytest.mark.parametrize('action', ('delete_notes', 'reset_titles'))
+def test_actions_need_permissions(author, client, django_user_model, action):
+    """Пользователь с правом только на просмотр не выполняет действия"""
+    viewer = django_user_model.objects.create(
+        username='Наблюдатель', is_staff=True
+    )
+    viewer.user_permissions.add(Permission.objects.get(codename='view_note'))
+    client.force_login(viewer)
+    create_notes(author, 1)
+    note = Note.objects.get()
+    run_action(client, action, [note])
+    assert Note.objects.get().title == note.title
@@ -0,0 +1,213 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+from notes.forms import WARNING
+from notes.models import Note, NotesVersion
+from notes.pagination import encode_cursor
+
+URL = reverse('notes:api')
+CHANGES_URL = reverse('notes:changes')
+
+
+def send(client, method, payload):
+    return getattr(client, method)(
+        URL, data=json.dumps(payload), content_type='application/json'
+    )
+
+
+def version(author):
+    return NotesVersion.objects.get(author=author).version
+
+
+def test_anonymous_forbidden(client):
+    """Анонимный пользователь не получает доступа к API"""
+    assert client.get(URL).status_code == 403
+
+
+def test_list(many_notes, author_client):
+    """GET отдаёт заметки автора с текстом"""
+    data = author_client.get(URL).json()
+    assert [note['slug'] for note in data['notes']] == [
+        f'slug-{index}' for index in range(5)
+    ]
+    assert data['notes'][0]['text']
+    assert data['next'] is None
+
+
+def test_batch_create(note, author, author_client, django_assert_num_queries):
+    """Пакет создаётся за постоянное число запросов"""
+    before = version(author)
+    notes = [
+        {'title': 'Заголовок', 'text': 'Текст'} for _ in range(3)
+    ] + [{'title': 'Заголовок', 'text': 'Текст', 'slug': 'zagolovok'}]
+    # Сессия, пользователь, проверка slug, slug с префиксом, INSERT,
+    # выбор созданных заметок, версия, журнал изменений и точка
+    # сохранения вокруг записи.
+    with django_assert_num_queries(10):
+        response = send(author_client, 'post', {'notes': notes})
+    assert response.status_code == 201
+    assert [note['slug'] for note in response.json()['notes']] == [
+        'zagolovok-2', 'zagolovok-3', 'zagolovok-4', 'zagolovok'
+    ]
+    assert all(note['id'] for note in response.json()['notes'])
+    assert Note.objects.count() == 5
+    assert version(author) == before + 1
+
+
+def test_create_rejects_taken_slug(note, author_client):
+    """Занятый slug отклоняет пакет целиком"""
+    notes = [
+        {'title': 'Новая', 'text': 'Текст'},
+        {'title': 'Другая', 'text': 'Текст', 'slug': note.slug},
+    ]
+    response = send(author_client, 'post', {'notes': notes})
+    assert response.status_code == 400
+    assert response.json()['errors'] == {'1': {'slug': [note.slug + WARNING]}}
+    assert Note.objects.count() == 1
+
+
+def test_create_validates_forms(author_client):
+    """Ошибки NoteForm возвращаются по номерам заметок"""
+    response = send(
+        author_client, 'post', {'notes': [{'title': 'Без текста'}]}
+    )
+    assert response.status_code == 400
+    assert set(response.json()['errors']['0']) == {'text'}
+
+
+def test_batch_limit(author_client, settings):
+    """Пакет длиннее NOTES_API_BATCH_LIMIT отклоняется"""
+    settings.NOTES_API_BATCH_LIMIT = 2
+    notes = [{'title': 'Заголовок', 'text': 'Текст'}] * 3
+    response = send(author_client, 'post', {'notes': notes})
+    assert response.status_code == 400
+    assert Note.objects.count() == 0
+
+
+def test_batch_update(many_notes, author, author_client):
+    """Пакет правок сохраняется одним запросом и повышает версию"""
+    ids = list(Note.objects.order_by('id').values_list('id', flat=True))
+    before = version(author)
+    response = send(author_client, 'patch', {'notes': [
+        {'id': ids[0], 'title': 'Новый заголовок'},
+        {'id': ids[1], 'slug': 'new-slug', 'text': 'Новый текст'},
+    ]})
+    assert response.status_code == 200
+    first, second = Note.objects.filter(id__in=ids[:2]).order_by('id')
+    assert (first.title, first.slug) == ('Новый заголовок', 'slug-0')
+    assert (second.slug, second.text) == ('new-slug', 'Новый текст')
+    assert version(author) == before + 1
+
+
+def test_update_rejects_slug_conflicts(many_notes, author_client):
+    """Занятый или повторённый в пакете slug отклоняет правки"""
+    ids = list(Note.objects.order_by('id').values_list('id', flat=True))
+    response = send(author_client, 'patch', {'notes': [
+        {'id': ids[0], 'slug': 'slug-4'},
+        {'id': ids[1], 'slug': 'same'},
+        {'id': ids[2], 'slug': 'same'},
+    ]})
+    assert response.status_code == 400
+    assert set(response.json()['errors']) == {'0', '2'}
+    assert Note.objects.get(id=ids[0]).slug == 'slug-0'
+
+
+@pytest.mark.parametrize(
+    'slugs', (('slug-1', 'slug-0'), ('slug-1', 'slug-2', 'free'))
+)
+def test_update_swaps_slugs(many_notes, author_client, slugs):
+    """Заметки пакета могут обменяться slug или передать его по цепочке"""
+    ids = list(Note.objects.order_by('id').values_list('id', flat=True))
+    response = send(author_client, 'patch', {'notes': [
+        {'id': pk, 'slug': slug} for pk, slug in zip(ids, slugs)
+    ]})
+    assert response.status_code == 200
+    assert [Note.objects.get(id=pk).slug for pk in ids[:len(slugs)]] == list(
+        slugs
+    )
+
+
+@pytest.mark.parametrize('method, payload', (
+    ('delete', {'ids': [10 ** 30]}),
+    ('patch', {'notes': [{'id': 10 ** 30, 'title': 'Заголовок'}]}),
+))
+def test_ids_out_of_range(author_client, method, payload):
+    """id вне диапазона bigint отклоняется с ошибкой 400"""
+    response = send(author_client, method, payload)
+    assert response.status_code == 400
+    assert set(response.json()['errors']) == {'0'}
+
+
+def test_update_foreign_note(note, admin_client):
+    """Чужую заметку нельзя изменить"""
+    response = send(admin_client, 'patch', {'notes': [
+        {'id': note.id, 'title': 'Чужой'}
+    ]})
+    assert response.status_code == 400
+    assert Note.objects.get(id=note.id).title == note.title
+
+
+@pytest.mark.usefixtures('many_notes')
+def test_batch_delete(author, author_client):
+    """Удаление пакета повышает версию один раз"""
+    ids = list(Note.objects.order_by('id').values_list('id', flat=True))
+    before = version(author)
+    response = send(author_client, 'delete', {'ids': ids[:3]})
+    assert response.json() == {'deleted': 3}
+    assert Note.objects.count() == 2
+    assert version(author) == before + 1
+
+
+def create_notes(client, count):
+    """Заметки slug-0, slug-1, ... через API: они попадают в журнал."""
+    send(client, 'post', {'notes': [
+        {'title': 'Заголовок', 'text': 'Текст', 'slug': f'slug-{index}'}
+        for index in range(count)
+    ]})
+
+
+def test_changes_feed(author_client, form_data):
+    """Лента после курсора содержит только изменённые и удалённые"""
+    create_notes(author_client, 5)
+    first = author_client.get(CHANGES_URL).json()
+    assert [note['slug'] for note in first['notes']] == [
+        f'slug-{index}' for index in range(5)
+    ]
+    assert first['deleted'] == []
+    author_client.post(reverse('notes:edit', args=('slug-1',)), form_data)
+    deleted_id = Note.objects.get(slug='slug-2').id
+    author_client.post(reverse('notes:delete', args=('slug-2',)))
+    delta = author_client.get(
+        CHANGES_URL, {'since': first['cursor']}
+    ).json()
+    assert [note['slug'] for note in delta['notes']] == [form_data['slug']]
+    assert delta['deleted'] == [deleted_id]
+    assert delta['more'] is False
+    empty = author_client.get(CHANGES_URL, {'since': delta['cursor']}).json()
+    assert (empty['notes'], empty['deleted']) == ([], [])
+    assert empty['cursor'] == delta['cursor']
+
+
+def test_changes_feed_pages(author_client, settings):
+    """Длинная лента отдаётся порциями по курсору"""
+    create_notes(author_client, 5)
+    settings.NOTES_CHANGES_PAGE_SIZE = 3
+    first = author_client.get(CHANGES_URL).json()
+    assert (len(first['notes']), first['more']) == (3, True)
+    rest = author_client.get(CHANGES_URL, {'since': first['cursor']}).json()
+    assert (len(rest['notes']), rest['more']) == (2, False)
+
+
+def test_changes_feed_cursor_out_of_range(author_client):
+    """Курсор с id вне диапазона bigint приводит к ошибке 404"""
+    response = author_client.get(
+        CHANGES_URL, {'since': encode_cursor(10 ** 30)}
+    )
+    assert response.status_code == 404
+
+
+def test_changes_feed_per_author(note, admin_client):
+    """Чужие изменения в ленту не попадают"""
+    assert admin_client.get(CHANGES_URL).json()['notes'] == []
@@ -0,0 +1,52 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+
+from notes import async_views
+from notes.compression import CompressionMiddleware
+from notes.metrics import MetricsMiddleware
+from notes.replicas import ReplicaMiddleware
+from notes.sqlite import WriteLockMiddleware
+
+# Асинхронные страницы читают базу из пула потоков, поэтому данные
+# теста должны быть зафиксированы, а не жить в транзакции теста.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def test_async_list_and_detail(rf, note, author):
+    """Асинхронные список и заметка отдают те же страницы"""
+    request = rf.get('/notes/')
+    request.user = author
+    response = async_to_sync(async_views.notes_list)(request)
+    assert response.status_code == HTTPStatus.OK
+    assert note.title in response.content.decode()
+
+    request = rf.get(f'/note/{note.slug}/')
+    request.user = author
+    response = async_to_sync(async_views.note_detail)(request, slug=note.slug)
+    assert response.status_code == HTTPStatus.OK
+    assert note.text in response.content.decode()
+
+
+def test_async_list_redirects_anonymous(rf):
+    """Анонимный пользователь перенаправляется на страницу входа"""
+    request = rf.get('/notes/')
+    request.user = AnonymousUser()
+    response = async_to_sync(async_views.notes_list)(request)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.parametrize('middleware', (
+    CompressionMiddleware, MetricsMiddleware,
+    ReplicaMiddleware, WriteLockMiddleware,
+))
+def test_middleware_follows_get_response_mode(middleware):
+    """Middleware асинхронная при асинхронном get_response и наоборот"""
+    async def async_get_response(request):
+        pass
+
+    assert asyncio.iscoroutinefunction(middleware(async_get_response))
+    assert not asyncio.iscoroutinefunction(middleware(lambda request: None))
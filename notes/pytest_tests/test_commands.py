@@ -0,0 +1,113 @@
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from notes.models import Note, NoteChange, NotesVersion
+
+
+@pytest.mark.parametrize('fmt', ('jsonl', 'csv'))
+def test_export_import_roundtrip(many_notes, author, tmp_path, fmt):
+    """Выгруженные заметки загружаются обратно без потерь"""
+    path = tmp_path / f'notes.{fmt}'
+    call_command('notes_export', str(path), chunk_size=2)
+    exported = list(
+        Note.objects.order_by('id').values_list('title', 'text', 'slug')
+    )
+    Note.objects.all().delete()
+    call_command('notes_import', str(path), batch_size=2)
+    imported = list(
+        Note.objects.order_by('id').values_list('title', 'text', 'slug')
+    )
+    assert imported == exported
+    assert set(Note.objects.values_list('author', flat=True)) == {author.id}
+
+
+def test_export_import_large_text(author, tmp_path, settings):
+    """Сжатый текст выгружается и загружается целиком"""
+    settings.NOTES_COMPRESS_TEXT_OVER = 10
+    text = 'Длинный текст заметки'
+    Note.objects.create(title='Лог', text=text, slug='log', author=author)
+    path = tmp_path / 'notes.jsonl'
+    call_command('notes_export', str(path))
+    Note.objects.all().delete()
+    call_command('notes_import', str(path))
+    note = Note.objects.get()
+    assert note.compressed_text is not None
+    assert note.load_text() == text
+
+
+def test_import_resolves_slug_conflicts(note, author, tmp_path):
+    """Занятые и повторяющиеся slug получают суффиксы"""
+    path = tmp_path / 'notes.jsonl'
+    records = [
+        {'title': 'Заголовок', 'text': 'Текст', 'slug': note.slug},
+        {'title': 'Заголовок', 'text': 'Текст'},
+        {'title': 'Заголовок', 'text': 'Текст'},
+    ]
+    path.write_text(
+        ''.join(json.dumps(record) + '\n' for record in records),
+        encoding='utf-8'
+    )
+    call_command('notes_import', str(path), author=author.username)
+    assert sorted(Note.objects.values_list('slug', flat=True)) == [
+        note.slug, note.slug + '-2', 'zagolovok', 'zagolovok-2'
+    ]
+
+
+def test_import_rejects_invalid_records(author, tmp_path, capsys):
+    """Записи с неверным slug или длинным заголовком пропускаются"""
+    path = tmp_path / 'notes.jsonl'
+    records = [
+        {'title': 'Заголовок', 'text': 'Текст', 'slug': 'bad slug!'},
+        {'title': 'З' * 101, 'text': 'Текст'},
+        {'title': 'Заголовок', 'text': 'Текст', 'slug': 'good'},
+    ]
+    path.write_text(
+        ''.join(json.dumps(record) + '\n' for record in records),
+        encoding='utf-8'
+    )
+    call_command('notes_import', str(path), author=author.username)
+    assert list(Note.objects.values_list('slug', flat=True)) == ['good']
+    out, err = capsys.readouterr()
+    assert 'Отклонено записей: 2' in out
+    assert 'Запись 1: slug:' in err
+    assert 'Запись 2: title:' in err
+
+
+def test_import_keeps_stdin_open(author, monkeypatch):
+    """Импорт из stdin не закрывает его"""
+    stdin = io.StringIO('{"title": "a", "text": "b"}\n')
+    monkeypatch.setattr('sys.stdin', stdin)
+    call_command('notes_import', '-', author=author.username)
+    assert not stdin.closed
+    assert Note.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_import_unknown_author(tmp_path):
+    """Импорт не создаёт заметок неизвестного пользователя"""
+    path = tmp_path / 'notes.jsonl'
+    path.write_text('{"title": "a", "text": "b", "author": "nobody"}\n')
+    with pytest.raises(CommandError):
+        call_command('notes_import', str(path))
+    assert Note.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_seed_notes(client, django_user_model):
+    """seed_notes создаёт пользователей с версиями и журналом заметок"""
+    call_command('seed_notes', users=3, notes_per_user=4, password='secret')
+    users = django_user_model.objects.filter(username__startswith='seed-')
+    assert users.count() == 3
+    assert Note.objects.count() == 12
+    assert NotesVersion.objects.count() == 3
+    assert NoteChange.objects.count() == 12
+    first_user_notes = Note.objects.filter(author=users.first())
+    assert set(first_user_notes.values_list('slug', flat=True)) == {
+        'note-0', 'note-3', 'note-6', 'note-9'
+    }
+    assert client.login(username='seed-0', password='secret')
+    with pytest.raises(CommandError):
+        call_command('seed_notes', users=1)
@@ -0,0 +1,96 @@
+import gzip
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from notes import compression
+
+URL = reverse('notes:list')
+GZIP = {'HTTP_ACCEPT_ENCODING': 'gzip, deflate'}
+
+
+@pytest.fixture
+def compressed(settings):
+    """Подключаем CompressionMiddleware и начинаем с пустого кэша"""
+    settings.MIDDLEWARE = [
+        'notes.compression.CompressionMiddleware', *settings.MIDDLEWARE
+    ]
+    settings.NOTES_COMPRESSION_MIN_SIZE = 200
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.parametrize(
+    'header, expected',
+    (
+        ('gzip, deflate, br', {'gzip', 'deflate', 'br'}),
+        ('gzip;q=0, br;q=0.5', {'br'}),
+        ('GZIP ; q=1.0', {'gzip'}),
+        ('', set()),
+    )
+)
+def test_accepted_encodings(header, expected):
+    assert compression.accepted_encodings(header) == expected
+
+
+def test_brotli_only_if_installed(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert compression.choose_encoding('br') is None
+    assert compression.choose_encoding('br, gzip') == 'gzip'
+
+
+@pytest.mark.usefixtures('compressed')
+def test_list_gzipped(many_notes, author_client):
+    plain = author_client.get(URL)
+    response = author_client.get(URL, **GZIP)
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert response['ETag'] == 'W/' + plain['ETag']
+    assert gzip.decompress(response.content) == plain.content
+    assert int(response['Content-Length']) == len(response.content)
+
+
+@pytest.mark.usefixtures('compressed')
+def test_weak_etag_gives_not_modified(many_notes, author_client):
+    etag = author_client.get(URL, **GZIP)['ETag']
+    response = author_client.get(URL, HTTP_IF_NONE_MATCH=etag, **GZIP)
+    assert response.status_code == 304
+
+
+@pytest.mark.usefixtures('compressed')
+def test_compressed_page_cached(many_notes, author_client, monkeypatch):
+    """Сжатая страница с ETag берётся из кэша, а не сжимается заново"""
+    expected = author_client.get(URL, **GZIP).content
+    monkeypatch.setattr(compression, 'compress', None)
+    assert author_client.get(URL, **GZIP).content == expected
+
+
+@pytest.mark.usefixtures('compressed')
+@pytest.mark.parametrize(
+    'name, headers, min_size',
+    (
+        ('notes:list', {}, 200),
+        ('notes:list', GZIP, 10 ** 6),
+        # В форме CSRF-токен: сжатие открыло бы атаку BREACH.
+        ('notes:add', GZIP, 200),
+    )
+)
+def test_not_compressed(many_notes, author_client, settings,
+                        name, headers, min_size):
+    settings.NOTES_COMPRESSION_MIN_SIZE = min_size
+    response = author_client.get(reverse(name), **headers)
+    assert response.status_code == 200
+    assert not response.has_header('Content-Encoding')
+
+
+@pytest.mark.usefixtures('compressed')
+def test_streaming_list_gzipped(many_notes, author_client, settings):
+    settings.NOTES_LIST_ROWS = True
+    settings.NOTES_LIST_CHUNK_SIZE = 2
+    plain = b''.join(author_client.get(URL).streaming_content)
+    response = author_client.get(URL, **GZIP)
+    assert response['Content-Encoding'] == 'gzip'
+    assert not response.has_header('Content-Length')
+    assert gzip.decompress(b''.join(response.streaming_content)) == plain
@@ -1,7 +1,12 @@
 import pytest
 
+from http import HTTPStatus
+
 from django.urls import reverse
 
+from notes.models import Note
+from notes.pagination import encode_cursor
+
 '''
 отдельная заметка передаётся на страницу 
 со списком заметок в списке object_list, в словаре context;
@@ -94,3 +99,88 @@ def test_pages_contains_form(author_client, name, args):
     response = author_client.get(url)
     # Проверяем, есть ли объект формы в словаре контекста:
     assert 'form' in response.context
+
+
+'''
+Список заметок выводится постранично: курсоры after/before
+позволяют пройти все страницы вперёд и назад.
+'''
+def test_notes_list_keyset_pagination(many_notes, author_client, settings):
+    settings.NOTES_PAGE_SIZE = 2
+    url = reverse('notes:list')
+    pages = []
+    response = author_client.get(url)
+    pages.append([note.id for note in response.context['object_list']])
+    while response.context['page_obj'].has_next():
+        cursor = response.context['page_obj'].next_cursor
+        response = author_client.get(url, {'after': cursor})
+        pages.append([note.id for note in response.context['object_list']])
+    # Все заметки выведены ровно один раз и по возрастанию id:
+    expected_ids = list(
+        Note.objects.order_by('id').values_list('id', flat=True)
+    )
+    assert sum(pages, []) == expected_ids
+    assert [len(page) for page in pages] == [2, 2, 1]
+    # С последней страницы можно вернуться на предпоследнюю:
+    cursor = response.context['page_obj'].previous_cursor
+    response = author_client.get(url, {'before': cursor})
+    assert [note.id for note in response.context['object_list']] == pages[1]
+
+
+def test_notes_list_defers_text(note, author_client):
+    """Список не загружает из базы текст заметок"""
+    response = author_client.get(reverse('notes:list'))
+    listed_note, = response.context['object_list']
+    assert 'text' in listed_note.get_deferred_fields()
+
+
+@pytest.mark.parametrize(
+    'cursor', ('!!!', encode_cursor(-1), encode_cursor(2 ** 63))
+)
+def test_notes_list_bad_cursor(author_client, cursor):
+    """Некорректный курсор и id вне диапазона приводят к ошибке 404"""
+    response = author_client.get(reverse('notes:list'), {'after': cursor})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('notes:list', None),
+        ('notes:detail', pytest.lazy_fixture('slug_for_args')),
+    )
+)
+def test_conditional_get(
+        author_client, name, args, django_assert_num_queries
+):
+    """Повторный запрос с ETag получает 304 без запроса заметок"""
+    url = reverse(name, args=args)
+    response = author_client.get(url)
+    etag = response['ETag']
+    # Сессия, пользователь и версия заметок.
+    with django_assert_num_queries(3):
+        response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    response = author_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_conditional_get_missing_note(note, author_client):
+    """If-Modified-Since не прячет ошибку 404 несуществующей заметки"""
+    response = author_client.get(
+        reverse('notes:detail', args=('missing',)),
+        HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_etag_changes_with_notes(note, author_client, form_data):
+    """Изменение заметок автора меняет ETag его страниц"""
+    url = reverse('notes:list')
+    etag = author_client.get(url)['ETag']
+    author_client.post(reverse('notes:add'), data=form_data)
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
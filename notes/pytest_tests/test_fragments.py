@@ -0,0 +1,49 @@
+import pytest
+from django.urls import reverse
+
+from notes import fragments
+from notes.models import Note
+
+pytestmark = pytest.mark.usefixtures('fragment_cache')
+
+
+def test_list_served_from_cache(note, author_client, django_assert_num_queries):
+    """Повторный запрос списка не обращается к заметкам"""
+    url = reverse('notes:list')
+    first = author_client.get(url)
+    # Остаются только запросы сессии, пользователя и версии заметок.
+    with django_assert_num_queries(3):
+        second = author_client.get(url)
+    assert second.content == first.content
+    assert fragments.stats()['hits'] == 1
+
+
+def test_detail_served_from_cache(note, author_client, django_assert_num_queries):
+    """Повторный запрос заметки не обращается к заметкам"""
+    url = reverse('notes:detail', args=(note.slug,))
+    first = author_client.get(url)
+    with django_assert_num_queries(3):
+        second = author_client.get(url)
+    assert second.content == first.content
+
+
+def test_cache_invalidated_on_change(note, author_client, form_data):
+    """Правка заметки сбрасывает кэш её автора"""
+    author_client.get(reverse('notes:list'))
+    author_client.get(reverse('notes:detail', args=(note.slug,)))
+    author_client.post(reverse('notes:edit', args=(note.slug,)), form_data)
+    response = author_client.get(reverse('notes:list'))
+    assert form_data['title'] in response.content.decode()
+    response = author_client.get(
+        reverse('notes:detail', args=(form_data['slug'],))
+    )
+    assert form_data['text'] in response.content.decode()
+    assert fragments.stats()['hits'] == 0
+
+
+def test_cache_is_per_author(note, author_client, admin_client, admin_user):
+    """Изменение заметок одного автора не сбрасывает кэш другого"""
+    author_client.get(reverse('notes:list'))
+    Note.objects.create(title='Админ', text='Текст', author=admin_user)
+    author_client.get(reverse('notes:list'))
+    assert fragments.stats() == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
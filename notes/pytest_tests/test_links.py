@@ -0,0 +1,44 @@
+import pytest
+from django.template import engines
+from django.urls import NoReverseMatch, reverse, set_script_prefix
+
+from notes import links
+from notes.links import note_url, slug_url
+
+
+@pytest.mark.parametrize(
+    'name', ('notes:detail', 'notes:edit', 'notes:delete')
+)
+def test_note_url_matches_reverse(name):
+    assert note_url(name, 'note-slug_1') == reverse(
+        name, kwargs={'slug': 'note-slug_1'}
+    )
+
+
+def test_slug_url_uses_script_prefix():
+    """Адрес учитывает префикс скрипта, под которым запущен проект"""
+    set_script_prefix('/yanote/')
+    try:
+        assert slug_url('notes:detail')('a') == '/yanote/note/a/'
+    finally:
+        set_script_prefix('/')
+    assert slug_url('notes:detail')('a') == '/note/a/'
+
+
+def test_invalid_slug_goes_through_reverse():
+    with pytest.raises(NoReverseMatch):
+        note_url('notes:detail', 'не slug')
+
+
+def test_root_urlconf_change_resets_cache(settings):
+    slug_url('notes:detail')
+    settings.ROOT_URLCONF = 'notes.urls'
+    assert links._builder.cache_info().currsize == 0
+
+
+def test_note_url_tag():
+    template = engines['django'].from_string(
+        "{% load notes_urls %}{% for slug in slugs %}"
+        "{% note_url 'notes:detail' slug %} {% endfor %}"
+    )
+    assert template.render({'slugs': ['a', 'b']}) == '/note/a/ /note/b/ '
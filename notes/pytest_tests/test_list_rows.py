@@ -0,0 +1,66 @@
+import re
+
+import pytest
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+
+from notes.models import Note
+
+URL = reverse('notes:list')
+
+
+@pytest.fixture
+def list_rows(settings):
+    settings.NOTES_LIST_ROWS = True
+    settings.NOTES_LIST_CHUNK_SIZE = 2
+
+
+def streamed(response):
+    assert isinstance(response, StreamingHttpResponse)
+    return b''.join(response.streaming_content).decode()
+
+
+def normalized(content):
+    return ' '.join(content.split())
+
+
+def test_rows_page_matches_models_page(many_notes, author_client, settings):
+    """Потоковый список совпадает со списком из моделей"""
+    expected = normalized(author_client.get(URL).content.decode())
+    settings.NOTES_LIST_ROWS = True
+    settings.NOTES_LIST_CHUNK_SIZE = 2
+    assert normalized(streamed(author_client.get(URL))) == expected
+
+
+@pytest.mark.usefixtures('list_rows')
+def test_rows_pagination(many_notes, author_client, settings):
+    """Курсоры потоковых страниц проходят все заметки вперёд и назад"""
+    settings.NOTES_PAGE_SIZE = 3
+    pages = []
+    params = {}
+    while True:
+        content = streamed(author_client.get(URL, params))
+        pages.append([int(pk) for pk in re.findall(r'(\d+):', content)])
+        cursor = re.search(r'\?after=([\w-]+)', content)
+        if cursor is None:
+            break
+        params = {'after': cursor.group(1)}
+    assert sum(pages, []) == list(
+        Note.objects.order_by('id').values_list('id', flat=True)
+    )
+    assert [len(page) for page in pages] == [3, 2]
+    before = re.search(r'\?before=([\w-]+)', content).group(1)
+    response = author_client.get(URL, {'before': before})
+    assert [
+        int(pk) for pk in re.findall(r'(\d+):', streamed(response))
+    ] == pages[0]
+
+
+@pytest.mark.usefixtures('list_rows')
+def test_rows_without_streaming(many_notes, author_client, settings):
+    """Асинхронный список получает кортежи, но не поток"""
+    settings.NOTES_ASYNC_VIEWS = True
+    response = author_client.get(URL)
+    row = response.context['object_list'][0]
+    assert row._fields == ('id', 'slug', 'title')
+    assert not hasattr(row, '_state')
@@ -133,3 +133,42 @@ def test_other_user_cant_delete_note(admin_client, form_data, slug_for_args):
     response = admin_client.post(url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Note.objects.count() == 1
+
+
+def test_other_user_can_reuse_slug(admin_client, admin_user, note, form_data):
+    """slug уникален только в пределах заметок одного автора"""
+
+    url = reverse('notes:add')
+    form_data['slug'] = note.slug
+    response = admin_client.post(url, data=form_data)
+    assertRedirects(response, reverse('notes:success'))
+    assert Note.objects.filter(slug=note.slug).count() == 2
+    # По одному и тому же адресу каждый видит свою заметку:
+    response = admin_client.get(reverse('notes:detail', args=(note.slug,)))
+    assert response.context['note'].author == admin_user
+
+
+def test_empty_slug_gets_suffix_on_conflict(author_client, author, form_data):
+    """Если slug из заголовка занят, к нему добавляется суффикс"""
+
+    url = reverse('notes:add')
+    form_data.pop('slug')
+    for _ in range(3):
+        author_client.post(url, data=form_data)
+    expected_slug = slugify(form_data['title'])
+    assert sorted(Note.objects.values_list('slug', flat=True)) == [
+        expected_slug, expected_slug + '-2', expected_slug + '-3'
+    ]
+
+
+def test_create_note_without_slug_check(
+        author_client, form_data, django_assert_num_queries
+):
+    """Создание заметки не проверяет slug отдельным запросом"""
+
+    url = reverse('notes:add')
+    # Сессия, пользователь, SAVEPOINT, INSERT, UPDATE версии заметок,
+    # запись журнала изменений и RELEASE SAVEPOINT.
+    with django_assert_num_queries(7):
+        author_client.post(url, data=form_data)
+    assert Note.objects.count() == 1
@@ -0,0 +1,77 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes import metrics
+
+pytestmark = pytest.mark.usefixtures('metrics_enabled')
+
+
+def test_queries_and_timings_recorded(note, author_client):
+    """Число запросов и задержки копятся по имени URL"""
+    with CaptureQueriesContext(connection) as queries:
+        author_client.get(reverse('notes:list'))
+    # Следующий запрос клиента очищает журнал запросов подключения.
+    query_count = len(queries)
+    author_client.get(reverse('notes:list'))
+    metrics.REGISTRY.flush()
+    report = metrics.report()['notes:list']
+    assert report['queries']['count'] == 2
+    assert report['queries']['sum'] == 2 * query_count
+    assert report['queries']['buckets'][-1] == 2
+    assert report['render_seconds']['count'] == 2
+    assert report['duration_seconds']['sum'] > 0
+
+
+def test_prometheus_endpoint(note, author_client, admin_client):
+    """Страница /metrics отдаёт гистограммы в формате Prometheus"""
+    author_client.get(reverse('notes:detail', args=(note.slug,)))
+    text = admin_client.get(reverse('metrics')).content.decode()
+    assert 'notes_request_queries_count{view="notes:detail"} 1' in text
+    assert '# TYPE notes_request_duration_seconds histogram' in text
+    assert 'notes_fragment_cache_hits_total 0' in text
+
+
+def test_metrics_command(note, author_client):
+    """Команда notes_metrics выводит собранные гистограммы"""
+    author_client.get(reverse('notes:home'))
+    metrics.REGISTRY.flush()
+    out = StringIO()
+    call_command('notes_metrics', stdout=out)
+    assert json.loads(out.getvalue())['notes:home']['queries']['count'] == 1
+
+
+@pytest.mark.parametrize('command', ('notes_metrics', 'notes_cache_stats'))
+def test_commands_need_shared_cache(settings, command):
+    """Без общего кэша команды не выводят заведомо пустой отчёт"""
+    settings.NOTES_SHARED_CACHE = False
+    with pytest.raises(CommandError):
+        call_command(command)
+
+
+def test_metrics_need_shared_cache(manage_check):
+    """NOTES_METRICS=1 без NOTES_REDIS_URL не запускается"""
+    result = manage_check(NOTES_METRICS='1')
+    assert result.returncode != 0
+    assert 'NOTES_REDIS_URL' in result.stderr
+
+
+def test_endpoint_access(author_client, client, settings):
+    """/metrics закрыта для всех, кроме сотрудников и разрешённых адресов"""
+    url = reverse('metrics')
+    assert client.get(url).status_code == 403
+    assert author_client.get(url).status_code == 403
+    settings.NOTES_METRICS_ALLOWED_IPS = {'10.0.0.5'}
+    assert client.get(url, REMOTE_ADDR='10.0.0.5').status_code == 200
+    assert client.get(url).status_code == 403
+
+
+def test_endpoint_disabled(client, settings):
+    """Без NOTES_METRICS страницы /metrics нет"""
+    settings.NOTES_METRICS = False
+    assert client.get(reverse('metrics')).status_code == 404
@@ -0,0 +1,137 @@
+"""Бюджеты SQL-запросов страниц.
+
+Для каждой страницы зафиксировано наибольшее допустимое число
+запросов; новый лишний запрос роняет тест. Отдельно проверяется, что
+число запросов списка и заметки не зависит от числа заметок.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+
+PASSWORD = 'Pa55-word-for-tests'
+# Сколько заметок создаётся для проверки на большом объёме.
+LOTS_OF_NOTES = 2000
+
+
+@pytest.fixture
+def reader(django_user_model):
+    """Пользователь с паролем для проверки входа"""
+    return django_user_model.objects.create_user(
+        username='reader', password=PASSWORD
+    )
+
+
+@pytest.fixture
+def lots_of_notes(author, admin_user):
+    """Много заметок автора и столько же у другого пользователя"""
+    Note.objects.bulk_create(
+        (
+            Note(
+                title=f'Заметка {index}',
+                text='Текст заметки ' * 20,
+                slug=f'bulk-{index}',
+                author=user,
+            )
+            for index in range(LOTS_OF_NOTES)
+            for user in (author, admin_user)
+        ),
+        batch_size=500,
+    )
+
+
+@pytest.mark.parametrize(
+    'name, args, method, data, budget',
+    (
+        # Сессия, пользователь; главная сама базу не читает.
+        ('notes:home', None, 'get', None, 2),
+        ('notes:add', None, 'get', None, 2),
+        # + SAVEPOINT, INSERT, версия, журнал изменений, RELEASE.
+        ('notes:add', None, 'post', pytest.lazy_fixture('form_data'), 7),
+        # + заметка.
+        ('notes:edit', pytest.lazy_fixture('slug_for_args'), 'get', None, 3),
+        # + заметка, SAVEPOINT, UPDATE, версия, журнал, RELEASE.
+        ('notes:edit', pytest.lazy_fixture('slug_for_args'), 'post',
+         pytest.lazy_fixture('form_data'), 8),
+        # + версия и заметка.
+        ('notes:detail', pytest.lazy_fixture('slug_for_args'), 'get',
+         None, 4),
+        ('notes:delete', pytest.lazy_fixture('slug_for_args'), 'get',
+         None, 3),
+        # + заметка, DELETE, версия, журнал.
+        ('notes:delete', pytest.lazy_fixture('slug_for_args'), 'post',
+         None, 6),
+        # + версия и страница заметок.
+        ('notes:list', None, 'get', None, 4),
+        ('notes:success', None, 'get', None, 2),
+        # + поиск id и выборка найденных заметок.
+        ('notes:search', None, 'get', {'q': 'Заголовок'}, 4),
+        # + журнал и изменённые заметки.
+        ('notes:changes', None, 'get', None, 4),
+        ('notes:api', None, 'get', None, 3),
+    )
+)
+@pytest.mark.usefixtures('note')
+def test_notes_query_budget(
+        author_client, django_assert_max_num_queries,
+        name, args, method, data, budget
+):
+    url = reverse(name, args=args)
+    with django_assert_max_num_queries(budget):
+        getattr(author_client, method)(url, data)
+
+
+@pytest.mark.parametrize(
+    'name, method, data, budget',
+    (
+        ('notes:home', 'get', None, 0),
+        ('users:login', 'get', None, 0),
+        ('users:signup', 'get', None, 0),
+        # Проверка имени, INSERT пользователя и создание его версии заметок.
+        ('users:signup', 'post', {
+            'username': 'newcomer',
+            'password1': PASSWORD,
+            'password2': PASSWORD,
+        }, 6),
+        # Пользователь, обновление last_login и новая сессия.
+        ('users:login', 'post', {
+            'username': 'reader',
+            'password': PASSWORD,
+        }, 9),
+        ('users:logout', 'get', None, 0),
+    )
+)
+@pytest.mark.usefixtures('reader')
+def test_anonymous_query_budget(
+        client, django_assert_max_num_queries, name, method, data, budget
+):
+    with django_assert_max_num_queries(budget):
+        getattr(client, method)(reverse(name), data)
+
+
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('notes:list', None),
+        ('notes:list', {'after': 'MTAwMA'}),
+        ('notes:detail', pytest.lazy_fixture('slug_for_args')),
+        ('notes:edit', pytest.lazy_fixture('slug_for_args')),
+        ('notes:api', None),
+    )
+)
+def test_query_count_does_not_grow(author_client, request, name, args):
+    """Число запросов одинаково для одной заметки и для тысяч"""
+    if isinstance(args, dict):
+        url, params = reverse(name), args
+    else:
+        url, params = reverse(name, args=args), None
+    with CaptureQueriesContext(connection) as few:
+        author_client.get(url, params)
+    few_count = len(few)
+    request.getfixturevalue('lots_of_notes')
+    with CaptureQueriesContext(connection) as many:
+        response = author_client.get(url, params)
+    assert response.status_code == 200
+    assert len(many) == few_count
@@ -0,0 +1,70 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from notes.models import Note
+from notes.replicas import PIN_COOKIE, ReplicaMiddleware, ReplicaRouter
+
+ROUTER = ReplicaRouter()
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.NOTES_REPLICA_DATABASES = ['replica0']
+
+
+def run(request, write=False):
+    """Проводит запрос через middleware и запоминает маршруты чтения"""
+    reads = {}
+
+    def view(request):
+        reads['before'] = ROUTER.db_for_read(Note)
+        reads['user'] = ROUTER.db_for_read(get_user_model())
+        if write:
+            ROUTER.db_for_write(Note)
+        reads['after'] = ROUTER.db_for_read(Note)
+        return HttpResponse()
+
+    return reads, ReplicaMiddleware(view)(request)
+
+
+@pytest.mark.usefixtures('replicas')
+def test_get_reads_notes_from_replica():
+    reads, response = run(RequestFactory().get('/notes/'))
+    assert reads == {'before': 'replica0', 'user': None, 'after': 'replica0'}
+    assert PIN_COOKIE not in response.cookies
+
+
+@pytest.mark.usefixtures('replicas')
+def test_read_after_write_uses_primary():
+    reads, response = run(RequestFactory().get('/notes/'), write=True)
+    assert reads['before'] == 'replica0'
+    assert reads['after'] is None
+    assert PIN_COOKIE in response.cookies
+
+
+@pytest.mark.usefixtures('replicas')
+@pytest.mark.parametrize('method', ('post', 'patch', 'delete'))
+def test_unsafe_methods_use_primary(method):
+    reads, _ = run(getattr(RequestFactory(), method)('/api/notes/'))
+    assert reads['before'] is None
+
+
+@pytest.mark.usefixtures('replicas')
+def test_pin_cookie_uses_primary():
+    factory = RequestFactory()
+    factory.cookies[PIN_COOKIE] = '1'
+    reads, _ = run(factory.get('/notes/'))
+    assert reads['before'] is None
+
+
+def test_outside_request_uses_primary():
+    assert ROUTER.db_for_read(Note) is None
+    assert ROUTER.db_for_write(Note) == 'default'
+
+
+def test_replicate_requires_replicas():
+    with pytest.raises(CommandError):
+        call_command('notes_replicate', '--once')
@@ -20,7 +20,7 @@ def test_home_availability_for_anonymous_user(client, name):
 
 @pytest.mark.parametrize(
     'name',
-    ('notes:list', 'notes:add', 'notes:success')
+    ('notes:list', 'notes:add', 'notes:success', 'notes:search')
 )
 def test_pages_availability_for_auth_user(admin_client, name):
     """Аутентифицированному пользователю доступна:
@@ -77,6 +77,7 @@ def test_pages_availability_for_different_users(
         ('notes:add', None),
         ('notes:success', None),
         ('notes:list', None),
+        ('notes:search', None),
     ),
 )
 def test_redirects(client, name, args):
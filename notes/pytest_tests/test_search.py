@@ -0,0 +1,63 @@
+import pytest
+from django.db.utils import ConnectionDoesNotExist
+from django.urls import reverse
+
+from notes.models import Note
+from notes.search import search_page
+
+URL = reverse('notes:search')
+
+
+def search(client, query, **params):
+    response = client.get(URL, {'q': query, **params})
+    return [note.title for note in response.context['object_list']]
+
+
+def test_search_finds_own_notes(author, author_client, admin_user):
+    """Находятся заметки автора по началу слова, чужие - нет"""
+    Note.objects.create(title='Покупки', text='Купить молоко', author=author)
+    Note.objects.create(title='Чужая', text='молоко', author=admin_user)
+    assert search(author_client, 'моло') == ['Покупки']
+
+
+def test_search_ranks_title_matches_first(author, author_client):
+    """Совпадение в заголовке важнее совпадения в тексте"""
+    Note.objects.create(title='Рецепт', text='Взять молоко', author=author)
+    Note.objects.create(title='Молоко', text='Купить', author=author)
+    assert search(author_client, 'молоко') == ['Молоко', 'Рецепт']
+
+
+def test_search_index_follows_changes(many_notes, author, author_client):
+    """Индекс видит заметки из bulk_create, правки и удаления"""
+    assert len(search(author_client, 'Заголовок')) == len(many_notes)
+    Note.objects.filter(slug='slug-0').update(title='Переименована')
+    Note.objects.filter(slug='slug-1').delete()
+    assert search(author_client, 'Переименована') == ['Переименована']
+    assert len(search(author_client, 'Заголовок')) == len(many_notes) - 2
+
+
+def test_search_paginates_results(many_notes, author_client, settings):
+    """Результаты поиска разбиты на страницы"""
+    settings.NOTES_PAGE_SIZE = 2
+    pages = [search(author_client, 'Заголовок', page=page)
+             for page in (1, 2, 3)]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert len(set(sum(pages, []))) == len(many_notes)
+
+
+def test_search_huge_page_number(note, author_client):
+    """Номер страницы за пределами bigint приводит к ошибке 404"""
+    response = author_client.get(URL, {'q': 'Заголовок', 'page': '9' * 25})
+    assert response.status_code == 404
+
+
+def test_search_query_syntax_is_escaped(note, author_client):
+    """Операторы FTS5 в запросе не ломают поиск"""
+    assert search(author_client, 'NOT "Заголовок* OR (') == []
+
+
+def test_search_uses_queryset_database(author):
+    """Поиск идёт в ту же базу, что и queryset страницы"""
+    queryset = Note.objects.using('missing')
+    with pytest.raises(ConnectionDoesNotExist):
+        search_page(queryset, author.pk, 'Заголовок', 1, 10)
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from notes.auth import user_cache_key
+
+
+@pytest.fixture
+def user_cache(settings):
+    """Включаем кэш пользователя сессии и начинаем с пустого кэша"""
+    settings.AUTHENTICATION_BACKENDS = [
+        'notes.auth.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.usefixtures('user_cache')
+@pytest.mark.parametrize(
+    'engine, queries',
+    (
+        # Версия заметок и страница заметок; сессия и пользователь
+        # берутся из кэша.
+        ('django.contrib.sessions.backends.cached_db', 2),
+        ('django.contrib.sessions.backends.signed_cookies', 2),
+        # Без кэша сессии остаётся её чтение из базы.
+        ('django.contrib.sessions.backends.db', 3),
+    )
+)
+def test_list_queries_by_session_engine(
+        settings, client, author, note, django_assert_num_queries,
+        engine, queries
+):
+    settings.SESSION_ENGINE = engine
+    client.force_login(author)
+    url = reverse('notes:list')
+    client.get(url)
+    with django_assert_num_queries(queries):
+        response = client.get(url)
+    assert note.title in response.content.decode()
+
+
+@pytest.mark.usefixtures('user_cache')
+def test_cached_user_forgotten_on_change(client, author):
+    """Смена пароля сбрасывает кэш и завершает прежние сессии"""
+    client.force_login(author)
+    client.get(reverse('notes:list'))
+    assert cache.get(user_cache_key(author.pk)) is not None
+    author.set_password('new-password')
+    author.save()
+    assert cache.get(user_cache_key(author.pk)) is None
+    response = client.get(reverse('notes:list'))
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.parametrize(
+    'env', ({'NOTES_SESSION_MODE': 'cached_db'}, {'NOTES_USER_CACHE': '1'})
+)
+def test_process_caches_need_shared_cache(manage_check, env):
+    """Кэш сессий и пользователей без NOTES_REDIS_URL не включается"""
+    result = manage_check(**env)
+    assert result.returncode != 0
+    assert 'NOTES_REDIS_URL' in result.stderr
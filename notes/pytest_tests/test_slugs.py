@@ -0,0 +1,42 @@
+from pytils.translit import slugify
+
+from notes.models import Note
+from notes.slugs import (EMPTY_TITLE_SLUG, next_free_slug, slugify_title,
+                         slugify_titles)
+
+
+def test_slugify_title_is_cached():
+    """Повторная транслитерация заголовка берётся из кэша"""
+    slugify_title.cache_clear()
+    assert slugify_title('Название заметки') == slugify('Название заметки')
+    slugify_title('Название заметки')
+    info = slugify_title.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_slugify_titles_keeps_order():
+    """Пакетная транслитерация возвращает slug в порядке заголовков"""
+    slugify_title.cache_clear()
+    titles = ['Первая', 'Вторая', 'Первая'] * 1000
+    assert slugify_titles(titles) == [slugify(title) for title in titles]
+    # Каждый различный заголовок транслитерирован ровно один раз:
+    assert slugify_title.cache_info().misses == 2
+
+
+def test_next_free_slug_respects_max_length():
+    """Суффикс не выводит slug за пределы максимальной длины"""
+    base = 'a' * 10
+    taken = {base, 'a' * 8 + '-2'}
+    assert next_free_slug(base, taken, max_length=10) == 'a' * 8 + '-3'
+
+
+def test_empty_title_slug(author):
+    """Заголовок без букв и цифр даёт непустой slug и в save, и в пачке"""
+    first = Note.objects.create(title='!!!', text='Текст', author=author)
+    second = Note.objects.create(title='???', text='Текст', author=author)
+    batch = Note.objects.allocate_slugs(
+        [Note(title='...', text='Текст', author=author)]
+    )
+    assert [first.slug, second.slug, batch[0].slug] == [
+        EMPTY_TITLE_SLUG, EMPTY_TITLE_SLUG + '-2', EMPTY_TITLE_SLUG + '-3'
+    ]
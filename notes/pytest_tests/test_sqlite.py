@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from notes import sqlite
+
+
+@pytest.fixture
+def write_lock(settings):
+    """Подключаем WriteLockMiddleware первым в цепочке"""
+    settings.MIDDLEWARE = [
+        'notes.sqlite.WriteLockMiddleware', *settings.MIDDLEWARE
+    ]
+    wrappers = list(connection.execute_wrappers)
+    yield
+    connection.execute_wrappers[:] = wrappers
+
+
+def test_apply_pragmas(settings, db):
+    settings.NOTES_SQLITE_PRAGMAS = {'cache_size': -4096}
+    sqlite.apply_pragmas(sender=None, connection=connection)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        assert cursor.fetchone()[0] == -4096
+
+
+@pytest.mark.parametrize(
+    'sql, expected',
+    (
+        ('SELECT 1', True),
+        ('  pragma journal_mode', True),
+        ('INSERT INTO t VALUES (1)', False),
+        ('BEGIN', False),
+    )
+)
+def test_is_read(sql, expected):
+    assert sqlite.is_read(sql) is expected
+
+
+@pytest.mark.usefixtures('write_lock')
+def test_write_lock_taken_for_writes(author_client, monkeypatch, form_data):
+    held = []
+    save = sqlite.serialize_writes
+
+    def spy(execute, sql, params, many, context):
+        result = save(execute, sql, params, many, context)
+        if not sqlite.is_read(sql):
+            held.append(sqlite.WRITE_LOCK.locked())
+        return result
+
+    monkeypatch.setattr(sqlite, 'serialize_writes', spy)
+    connection.execute_wrappers[:] = []
+    author_client.post(reverse('notes:add'), data=form_data)
+    assert held and all(held)
+    assert not sqlite.WRITE_LOCK.locked()
+
+
+@pytest.mark.usefixtures('write_lock')
+def test_write_lock_skips_reads(author_client, note, monkeypatch):
+    acquire = []
+    monkeypatch.setattr(
+        sqlite, 'WRITE_LOCK', type(
+            'Lock', (), {'acquire': lambda self: acquire.append(1)}
+        )()
+    )
+    author_client.get(reverse('notes:detail', args=(note.slug,)))
+    assert acquire == []
@@ -0,0 +1,126 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import override_settings
+
+from notes.staticfiles import IMMUTABLE, StaticFilesApp
+
+CSS = 'admin/css/base.css'
+
+
+@pytest.fixture(scope='module')
+def static_root(tmp_path_factory):
+    """Собираем статику с хэшами и сжатыми копиями один раз на модуль"""
+    root = tmp_path_factory.mktemp('static')
+    with override_settings(
+        STATIC_ROOT=root,
+        STATICFILES_STORAGE=(
+            'notes.staticfiles.CompressedManifestStaticFilesStorage'
+        ),
+    ):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        yield root
+
+
+@pytest.fixture
+def manifest(static_root):
+    with open(static_root / 'staticfiles.json') as manifest_file:
+        return json.load(manifest_file)['paths']
+
+
+@pytest.fixture
+def app(static_root):
+    def django_app(environ, start_response):
+        start_response('200 OK', [])
+        return [b'django']
+
+    return StaticFilesApp(django_app, root=static_root, prefix='/static/')
+
+
+def get(app, path, **headers):
+    responses = []
+
+    def start_response(status, headers):
+        responses.append((status, dict(headers)))
+
+    body = b''.join(app({
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **headers,
+    }, start_response))
+    status, response_headers = responses[0]
+    return status, response_headers, body
+
+
+def test_collectstatic_precompresses(static_root, manifest):
+    hashed = static_root / manifest[CSS]
+    assert hashed.name != 'base.css'
+    assert gzip.decompress(
+        (static_root / (manifest[CSS] + '.gz')).read_bytes()
+    ) == hashed.read_bytes()
+
+
+def test_static_tag_uses_hashed_name(static_root, manifest):
+    with override_settings(
+        STATIC_ROOT=static_root,
+        STATICFILES_STORAGE=(
+            'notes.staticfiles.CompressedManifestStaticFilesStorage'
+        ),
+    ):
+        assert static(CSS) == '/static/' + manifest[CSS]
+
+
+def test_hashed_file_immutable(app, static_root, manifest):
+    status, headers, body = get(app, '/static/' + manifest[CSS])
+    assert status == '200 OK'
+    assert headers['Cache-Control'] == IMMUTABLE
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert body == (static_root / manifest[CSS]).read_bytes()
+
+
+def test_gzip_copy_served(app, static_root, manifest):
+    status, headers, body = get(
+        app, '/static/' + manifest[CSS], HTTP_ACCEPT_ENCODING='gzip'
+    )
+    assert headers['Content-Encoding'] == 'gzip'
+    assert int(headers['Content-Length']) == len(body)
+    assert gzip.decompress(body) == (static_root / manifest[CSS]).read_bytes()
+
+
+def test_variants_have_own_etags(app, manifest):
+    """У сжатой копии свой ETag; ETag другой копии не даёт 304"""
+    url = '/static/' + manifest[CSS]
+    _, plain, _ = get(app, url)
+    _, gzipped, _ = get(app, url, HTTP_ACCEPT_ENCODING='gzip')
+    assert plain['ETag'] != gzipped['ETag']
+    status, _, _ = get(app, url, HTTP_IF_NONE_MATCH=plain['ETag'],
+                       HTTP_ACCEPT_ENCODING='gzip')
+    assert status == '200 OK'
+    status, _, _ = get(app, url, HTTP_IF_NONE_MATCH=gzipped['ETag'],
+                       HTTP_ACCEPT_ENCODING='gzip')
+    assert status == '304 Not Modified'
+
+
+def test_unhashed_file_revalidated(app, settings):
+    status, headers, _ = get(app, '/static/' + CSS)
+    assert headers['Cache-Control'] == (
+        f'public, max-age={settings.NOTES_STATIC_MAX_AGE}'
+    )
+    status, _, body = get(
+        app, '/static/' + CSS, HTTP_IF_NONE_MATCH=headers['ETag']
+    )
+    assert status == '304 Not Modified'
+    assert body == b''
+
+
+@pytest.mark.parametrize(
+    'path, expected_status, expected_body',
+    (
+        ('/notes/', '200 OK', b'django'),
+        ('/static/missing.css', '404 Not Found', b''),
+    )
+)
+def test_other_paths(app, path, expected_status, expected_body):
+    status, _, body = get(app, path)
+    assert (status, body) == (expected_status, expected_body)
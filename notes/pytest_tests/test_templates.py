@@ -0,0 +1,112 @@
+import re
+
+import pytest
+from django.conf import settings as django_settings
+from django.template import engines
+from django.urls import reverse
+
+from notes.warmup import template_names, warm_templates
+
+JINJA2 = {
+    'BACKEND': 'django.template.backends.jinja2.Jinja2',
+    'DIRS': [django_settings.BASE_DIR / 'jinja2'],
+    'OPTIONS': {'environment': 'notes.jinja.environment'},
+}
+
+
+def test_template_names():
+    names = template_names(django_settings.BASE_DIR / 'templates')
+    assert 'notes/list.html' in names
+    assert 'includes/header.html' in names
+
+
+def test_warm_templates_fills_cache():
+    """Прогрев кладёт в кэш загрузчика все шаблоны из DIRS"""
+    loader = engines['django'].engine.template_loaders[0]
+    loader.reset()
+    count = warm_templates()
+    # С NOTES_JINJA2=1 прогреваются и шаблоны каталога jinja2/.
+    assert count == sum(
+        len(template_names(directory))
+        for engine in engines.all() for directory in engine.dirs
+    )
+    assert 'notes/list.html' in loader.get_template_cache
+
+
+def test_warm_templates_disabled(settings):
+    settings.NOTES_TEMPLATE_WARMUP = False
+    assert warm_templates() == 0
+
+
+def django_templates(templates):
+    """TEMPLATES без движка Jinja2."""
+    return [
+        engine for engine in templates
+        if engine['BACKEND'] != JINJA2['BACKEND']
+    ]
+
+
+@pytest.fixture
+def jinja2_templates(settings):
+    pytest.importorskip('jinja2')
+    # С NOTES_JINJA2=1 движок уже есть; второй с тем же именем Django
+    # не примет.
+    settings.TEMPLATES = [JINJA2, *django_templates(settings.TEMPLATES)]
+
+
+def normalize(html):
+    """Страница без пробелов между тегами и без значения CSRF-токена."""
+    html = re.sub(r'value="[A-Za-z0-9]{64}"', 'value=""', html)
+    return re.sub(r'\s+', ' ', html).replace('> <', '><').strip()
+
+
+@pytest.mark.usefixtures('jinja2_templates')
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('notes:list', None),
+        ('notes:detail', pytest.lazy_fixture('slug_for_args')),
+    )
+)
+def test_jinja2_pages(author_client, note, name, args):
+    """Страницы notes на Jinja2 совпадают по содержанию с Django"""
+    response = author_client.get(reverse(name, args=args))
+    assert response.status_code == 200
+    # Тестовый клиент запоминает только шаблоны DjangoTemplates:
+    # из них на странице Jinja2 только общие макет и подключаемые части.
+    names = {template.name for template in response.templates}
+    assert 'base.html' in names
+    assert not any(name.startswith('notes/') for name in names)
+    content = response.content.decode()
+    assert note.title in content
+    assert reverse('users:logout') in content
+
+
+@pytest.mark.parametrize(
+    'name, args, params',
+    (
+        ('notes:home', None, {}),
+        ('notes:list', None, {}),
+        ('notes:detail', pytest.lazy_fixture('slug_for_args'), {}),
+        ('notes:edit', pytest.lazy_fixture('slug_for_args'), {}),
+        ('notes:delete', pytest.lazy_fixture('slug_for_args'), {}),
+        ('notes:add', None, {}),
+        ('notes:success', None, {}),
+        ('notes:search', None, {'q': 'Заголовок'}),
+    )
+)
+def test_jinja2_pages_match_django(
+        author_client, note, settings, name, args, params
+):
+    """Копии страниц notes на Jinja2 не расходятся с шаблонами Django"""
+    pytest.importorskip('jinja2')
+    url = reverse(name, args=args)
+    settings.TEMPLATES = django_templates(settings.TEMPLATES)
+    django_page = author_client.get(url, params).content.decode()
+    settings.TEMPLATES = [JINJA2, *settings.TEMPLATES]
+    response = author_client.get(url, params)
+    assert not any(
+        template.name.startswith('notes/')
+        for template in response.templates
+    )
+    assert normalize(response.content.decode()) == normalize(django_page)
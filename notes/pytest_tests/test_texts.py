@@ -0,0 +1,133 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.html import escape
+
+from notes import texts
+from notes.models import Note
+
+# Кириллица и разметка: проверяем и UTF-8 на границах частей,
+# и экранирование.
+LARGE_TEXT = 'Строка <журнала> & ' * 400 + 'хвостовоеслово'
+
+
+@pytest.fixture(autouse=True)
+def small_threshold(settings):
+    settings.NOTES_COMPRESS_TEXT_OVER = 1000
+
+
+@pytest.fixture
+def large_note(author):
+    return Note.objects.create(
+        title='Лог', text=LARGE_TEXT, slug='log', author=author
+    )
+
+
+def stored(note):
+    return Note.objects.values_list('text', 'compressed_text').get(
+        pk=note.pk
+    )
+
+
+def test_large_text_stored_compressed(large_note):
+    """Большой текст хранится сжатым, в памяти заметки он целиком"""
+    text, compressed_text = stored(large_note)
+    assert text == ''
+    assert texts.decompress(compressed_text) == LARGE_TEXT
+    assert large_note.text == LARGE_TEXT
+    assert Note.objects.get(pk=large_note.pk).load_text() == LARGE_TEXT
+
+
+def test_shrunk_text_stored_plain(large_note):
+    """Укороченный текст снова хранится как есть"""
+    large_note.text = 'Коротко'
+    large_note.save()
+    assert stored(large_note) == ('Коротко', None)
+
+
+def test_save_without_loading_keeps_text(large_note):
+    """Сохранение без распаковки не теряет сжатый текст"""
+    note = Note.objects.get(pk=large_note.pk)
+    note.title = 'Новый'
+    note.save()
+    assert texts.decompress(stored(note)[1]) == LARGE_TEXT
+
+
+def test_save_without_text_skips_packing(large_note):
+    """Запись без text не сжимает текст и не трогает поисковый индекс"""
+    note = Note.objects.only('id', 'title', 'slug', 'author').get(
+        pk=large_note.pk
+    )
+    note.title = 'Новый'
+    with CaptureQueriesContext(connection) as queries:
+        note.save(update_fields=['title'])
+    note_queries = [
+        query['sql'] for query in queries
+        if 'notes_note"' in query['sql'] or 'notes_note_search' in query['sql']
+    ]
+    assert note_queries == [
+        'UPDATE "notes_note" SET "title" = \'Новый\' '
+        f'WHERE "notes_note"."id" = {note.pk}'
+    ]
+    assert stored(note)[0] == ''
+
+
+def test_detail_streams_large_text(large_note, author_client):
+    """Страница заметки с большим текстом отдаётся потоком"""
+    response = author_client.get(reverse('notes:detail', args=('log',)))
+    assert response.streaming
+    content = b''.join(response.streaming_content).decode()
+    assert escape(LARGE_TEXT) in content
+    assert 'Лог' in content
+
+
+def test_iter_escaped_small_chunks():
+    """Части распакованного текста не рвут символы UTF-8"""
+    chunks = list(texts.iter_escaped(texts.compress(LARGE_TEXT), 7))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == escape(LARGE_TEXT)
+
+
+def test_edit_form_shows_large_text(large_note, author_client):
+    response = author_client.get(reverse('notes:edit', args=('log',)))
+    assert response.context['form'].initial['text'] == LARGE_TEXT
+
+
+def test_list_does_not_read_texts(large_note, author_client):
+    """Список не читает ни текст, ни сжатый текст"""
+    with CaptureQueriesContext(connection) as queries:
+        author_client.get(reverse('notes:list'))
+    assert not any('text' in query['sql'] for query in queries)
+
+
+def test_search_finds_large_text(large_note, author_client):
+    """Сжатый текст попадает в поисковый индекс"""
+    response = author_client.get(
+        reverse('notes:search'), {'q': 'хвостовоеслово'}
+    )
+    assert list(response.context['object_list']) == [large_note]
+
+
+def test_api_large_texts(author_client):
+    """API пакетно сжимает, индексирует и отдаёт большие тексты"""
+    url = reverse('notes:api')
+    author_client.post(url, data=json.dumps({'notes': [
+        {'title': 'Лог', 'text': LARGE_TEXT, 'slug': 'log'},
+        {'title': 'Мал', 'text': 'Коротко', 'slug': 'small'},
+    ]}), content_type='application/json')
+    note = Note.objects.get(slug='log')
+    assert stored(note)[0] == ''
+    author_client.patch(url, data=json.dumps({'notes': [
+        {'id': note.pk, 'title': 'Переименован'},
+    ]}), content_type='application/json')
+    data = author_client.get(url).json()['notes']
+    assert [item['text'] for item in data] == [LARGE_TEXT, 'Коротко']
+    response = author_client.get(
+        reverse('notes:search'), {'q': 'хвостовоеслово'}
+    )
+    assert [found.title for found in response.context['object_list']] == [
+        'Переименован'
+    ]
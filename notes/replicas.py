@@ -0,0 +1,122 @@
+"""Чтение заметок с реплик базы (NOTES_REPLICAS).
+
+ReplicaRouter отправляет чтение моделей приложения notes — список
+заметок, заметку, версию заметок для ETag — на одну из реплик из
+settings.NOTES_REPLICA_DATABASES, а всё остальное и любую запись — на
+default. Реплика выбирается один раз на запрос, чтобы версия и заметки
+на одной странице не пришли с реплик с разным отставанием.
+
+С основной базы читает весь запрос, если:
+
+- это POST, PUT, PATCH или DELETE: проверка slug, загрузка пачки
+  заметок API и прочие чтения перед записью должны видеть свежие данные;
+- в нём уже была запись (read-after-write внутри запроса);
+- пользователь недавно что-то менял: после записи ставится cookie
+  PIN_COOKIE на NOTES_REPLICA_PIN_SECONDS секунд, и переход на список
+  после сохранения показывает новую заметку, даже если реплика отстаёт.
+
+Вне запроса (команды, оболочка) маршрутизатор ничего не меняет, всё
+идёт в default. Для проверки на одной машине реплики — копии файла
+SQLite, которые команда notes_replicate обновляет с задержкой.
+"""
+import random
+import sqlite3
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from .middleware import AsyncCapableMiddleware
+
+PIN_COOKIE = 'notes_primary'
+UNSAFE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+
+# Маршрут текущего запроса; None — запрос не проходит через middleware.
+_route = ContextVar('replica_route', default=None)
+
+
+class Route:
+    """Реплика запроса и признак того, что читать нужно с default."""
+
+    def __init__(self, replica, pinned):
+        self.replica = replica
+        self.pinned = pinned
+        self.wrote = False
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        route = _route.get()
+        if (route is None or route.pinned
+                or model._meta.app_label != 'notes'):
+            return None
+        return route.replica
+
+    def db_for_write(self, model, **hints):
+        route = _route.get()
+        if route is not None:
+            route.pinned = route.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, связи между ними допустимы.
+        return True
+
+
+def replicate():
+    """Копирует базу default SQLite во все реплики.
+
+    Один вызов — одна «волна» репликации: до следующего вызова реплики
+    отстают от default. Копирование идёт через backup API SQLite и не
+    мешает читать реплику.
+    """
+    source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+    try:
+        for alias in settings.NOTES_REPLICA_DATABASES:
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+    finally:
+        source.close()
+
+
+class ReplicaMiddleware(AsyncCapableMiddleware):
+    """Выбирает реплику для запроса и закрепляет пишущих за default."""
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        route, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _route.reset(token)
+        return self.finish(route, response)
+
+    async def __acall__(self, request):
+        route, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _route.reset(token)
+        return self.finish(route, response)
+
+    def start(self, request):
+        route = Route(
+            random.choice(settings.NOTES_REPLICA_DATABASES),
+            request.method in UNSAFE_METHODS or PIN_COOKIE in request.COOKIES,
+        )
+        return route, _route.set(route)
+
+    def finish(self, route, response):
+        if route.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.NOTES_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,158 @@
+"""Полнотекстовый поиск по заголовкам и текстам заметок.
+
+На SQLite индекс — виртуальная таблица FTS5, на PostgreSQL — столбец
+tsvector с GIN-индексом. В обоих случаях индекс обновляется триггерами
+базы, поэтому его не обходят ни bulk_create, ни массовые update/delete.
+Сжатые тексты больших заметок (см. notes.texts) триггерам не видны:
+их индексирует index_texts() после каждой записи такой заметки.
+На остальных СУБД поиск сводится к icontains по несжатым текстам.
+"""
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+
+from .models import Note
+from .pagination import MAX_ID, KeysetPage
+
+SQLITE_TABLE = 'notes_note_search'
+SQLITE_TRIGGERS = (
+    f'''CREATE TRIGGER IF NOT EXISTS notes_note_search_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO {SQLITE_TABLE} (rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'a' || new.author_id);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS notes_note_search_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        UPDATE {SQLITE_TABLE}
+        SET title = new.title, text = new.text, owner = 'a' || new.author_id
+        WHERE rowid = old.id;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS notes_note_search_delete
+    AFTER DELETE ON notes_note BEGIN
+        DELETE FROM {SQLITE_TABLE} WHERE rowid = old.id;
+    END''',
+)
+
+POSTGRESQL_REINDEX = (
+    "UPDATE notes_note SET search_vector = "
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('russian', %s), 'B') WHERE id = %s"
+)
+
+
+def restore_sqlite_triggers(sender, using, **kwargs):
+    """Возвращает триггеры FTS5 после миграций (сигнал post_migrate).
+
+    SQLite изменяет схему таблицы, пересоздавая её целиком, и триггеры
+    старой таблицы при этом пропадают. Сам индекс не страдает: строки
+    копируются с прежними id.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    if SQLITE_TABLE not in db.introspection.table_names():
+        return
+    with db.cursor() as cursor:
+        for sql in SQLITE_TRIGGERS:
+            cursor.execute(sql)
+
+
+def index_texts(texts, using='default'):
+    """Записывает в индекс тексты заметок, хранящиеся сжатыми.
+
+    texts — пары (id, text). Триггеры индексируют пустой столбец text
+    такой заметки, поэтому функцию вызывают после её записи.
+    """
+    db = connections[using]
+    if db.vendor == 'sqlite':
+        sql = f'UPDATE {SQLITE_TABLE} SET text = %s WHERE rowid = %s'
+    elif db.vendor == 'postgresql':
+        sql = POSTGRESQL_REINDEX
+    else:
+        return
+    with db.cursor() as cursor:
+        cursor.executemany(sql, [(text, pk) for pk, text in texts])
+
+
+def fts5_query(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки (операторы FTS5 не срабатывают)
+    и ищется по префиксу; слова объединяются через AND.
+    """
+    terms = ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in query.split()
+    )
+    return '{title text} : (' + terms + ')'
+
+
+def search_note_ids(author_id, query, limit, offset=0, using='default'):
+    """id заметок автора, подходящих под запрос, от лучших к худшим.
+
+    using — база, из которой читает queryset страницы: при репликах
+    поиск идёт туда же, куда его направил роутер.
+    """
+    if not query.split():
+        return []
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        sql = (
+            f'SELECT rowid FROM {SQLITE_TABLE} '
+            f'WHERE {SQLITE_TABLE} MATCH %s '
+            # Заголовок весит больше текста, служебный owner не влияет.
+            f'ORDER BY bm25({SQLITE_TABLE}, 10.0, 1.0, 0.0) '
+            'LIMIT %s OFFSET %s'
+        )
+        params = [
+            f'owner : "a{int(author_id)}" AND {fts5_query(query)}',
+            limit, offset,
+        ]
+    elif connection.vendor == 'postgresql':
+        sql = (
+            'SELECT id FROM notes_note '
+            "WHERE author_id = %s AND search_vector @@ "
+            "plainto_tsquery('russian', %s) "
+            "ORDER BY ts_rank(search_vector, plainto_tsquery('russian', %s)) "
+            'DESC, id LIMIT %s OFFSET %s'
+        )
+        params = [author_id, query, query, limit, offset]
+    else:
+        words = Q()
+        for word in query.split():
+            words &= Q(title__icontains=word) | Q(text__icontains=word)
+        notes = Note.objects.using(using).filter(words, author_id=author_id)
+        return list(
+            notes.order_by('id').values_list('id', flat=True)[
+                offset:offset + limit
+            ]
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_page(queryset, author_id, query, page_number, per_page):
+    """Страница результатов поиска.
+
+    Результаты упорядочены по релевантности, поэтому страницы
+    нумеруются, а курсорами служат номера соседних страниц. Номер,
+    при котором смещение не помещается в bigint, приводит к 404.
+    """
+    try:
+        page_number = max(int(page_number or 1), 1)
+    except ValueError:
+        page_number = 1
+    if page_number * per_page >= MAX_ID:
+        raise Http404('Нет такой страницы.')
+    ids = search_note_ids(
+        author_id, query, per_page + 1, (page_number - 1) * per_page,
+        using=queryset.db,
+    )
+    has_next = len(ids) > per_page
+    ids = ids[:per_page]
+    notes = queryset.in_bulk(ids)
+    return KeysetPage(
+        [notes[pk] for pk in ids if pk in notes],
+        next_cursor=page_number + 1 if has_next else None,
+        previous_cursor=page_number - 1 if page_number > 1 else None,
+    )
@@ -0,0 +1,83 @@
+"""Быстрое наполнение базы синтетическими пользователями и заметками.
+
+Используется командой seed_notes и скриптами из каталога benchmarks.
+Пароль у всех пользователей один, его хэш считается один раз.
+Заметки вставляются executemany пачками по SEED_BATCH_SIZE, минуя
+модели, со slug, вычисленными заранее. Версии заметок и журнал
+изменений заполняются так же, как при обычной работе, поэтому
+засеянные данные ничем не отличаются от настоящих.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Note, NoteChange, NotesVersion
+
+SEED_BATCH_SIZE = 10000
+SEED_PASSWORD = 'seed-password'
+
+
+def default_text(index):
+    return 'Текст заметки ' * 20
+
+
+def seed_notes(users_count, notes_count, text=default_text, prefix='seed',
+               password=SEED_PASSWORD, using='default'):
+    """Создаёт users_count пользователей и notes_count заметок.
+
+    Пользователи получают имена prefix-0, prefix-1, ...; заметки
+    распределяются между ними по кругу, у заметки с номером i заголовок
+    «Заметка i» и slug note-i. text(i) задаёт текст заметки. Возвращает
+    id пользователей в порядке их номеров.
+    """
+    User = get_user_model()
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    now = timezone.now()
+    password_hash = make_password(password)
+    with transaction.atomic(using=using):
+        User.objects.using(using).bulk_create(
+            (User(username=f'{prefix}-{index}', password=password_hash)
+             for index in range(users_count)),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        user_ids = list(
+            User.objects.using(using).filter(
+                username__startswith=f'{prefix}-'
+            ).order_by('id').values_list('id', flat=True)
+        )
+        NotesVersion.objects.using(using).bulk_create(
+            (NotesVersion(author_id=user_id) for user_id in user_ids),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        last_id = Note.objects.using(using).aggregate(
+            last_id=Max('id')
+        )['last_id'] or 0
+        insert_notes = (
+            'INSERT INTO {} (title, text, slug, author_id, created, updated) '
+            'VALUES (%s, %s, %s, %s, %s, %s)'
+        ).format(quote(Note._meta.db_table))
+        with connection.cursor() as cursor:
+            for start in range(0, notes_count, SEED_BATCH_SIZE):
+                stop = min(start + SEED_BATCH_SIZE, notes_count)
+                cursor.executemany(insert_notes, [
+                    (f'Заметка {index}', text(index), f'note-{index}',
+                     user_ids[index % users_count], now, now)
+                    for index in range(start, stop)
+                ])
+            # Журнал изменений заполняется одним INSERT ... SELECT,
+            # как будто каждая заметка только что создана.
+            cursor.execute(
+                'INSERT INTO {0} (author_id, note_id, deleted) '
+                'SELECT author_id, id, %s FROM {1} WHERE id > %s '
+                'ORDER BY id'.format(
+                    quote(NoteChange._meta.db_table),
+                    quote(Note._meta.db_table),
+                ),
+                [False, last_id],
+            )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return user_ids
@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .models import Note, NoteChange, NotesVersion
+
+# Изменения заметок (author_id, note_id, deleted), которые запишутся
+# по выходе из coalesce_note_changes(); None — записывать сразу.
+_pending_changes = ContextVar('pending_changes', default=None)
+
+
+def save_changes(changes):
+    """Повышает версии авторов и записывает изменения в журнал."""
+    NotesVersion.objects.bump({author_id for author_id, _, _ in changes})
+    NoteChange.objects.record(changes)
+
+
+@contextmanager
+def coalesce_note_changes():
+    """Собирает изменения заметок внутри блока в два запроса.
+
+    Массовые операции, которые вызывают сигналы для каждой заметки
+    (например, QuerySet.delete()), иначе повышали бы версию автора
+    и писали журнал отдельными запросами на каждую заметку. Блок стоит
+    выполнять внутри той же транзакции, что и сами изменения.
+    """
+    pending = []
+    token = _pending_changes.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending_changes.reset(token)
+    if pending:
+        save_changes(pending)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_notes_version(sender, instance, created, **kwargs):
+    """У каждого пользователя с момента регистрации есть версия заметок."""
+    if created:
+        NotesVersion.objects.get_or_create(author_id=instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    """Изменённый пользователь больше не берётся из кэша сессий."""
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def log_note_change(sender, instance, signal, **kwargs):
+    """Изменение заметки делает устаревшими ETag и кэш страниц автора
+    и попадает в ленту изменений."""
+    change = (instance.author_id, instance.pk, signal is post_delete)
+    pending = _pending_changes.get()
+    if pending is None:
+        save_changes([change])
+    else:
+        pending.append(change)
@@ -0,0 +1,49 @@
+from functools import lru_cache
+
+from pytils.translit import slugify
+
+# Сколько разных заголовков хранит кэш транслитерации.
+SLUG_CACHE_SIZE = 4096
+
+# slug заголовка, в котором нет ни одной буквы или цифры («!!!»).
+EMPTY_TITLE_SLUG = 'note'
+
+# Запас длины под суффикс вида «-12345» при подборе свободного slug.
+SUFFIX_RESERVE = 8
+
+
+def suffixed_slug(base_slug, number, max_length):
+    """slug с числовым суффиксом, укороченный до max_length."""
+    suffix = f'-{number}'
+    return base_slug[:max_length - len(suffix)] + suffix
+
+
+def next_free_slug(base_slug, taken, max_length):
+    """Первый из вариантов base-2, base-3, ..., которого нет в taken."""
+    number = 2
+    slug = suffixed_slug(base_slug, number, max_length)
+    while slug in taken:
+        number += 1
+        slug = suffixed_slug(base_slug, number, max_length)
+    return slug
+
+
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def slugify_title(title):
+    """Транслитерирует заголовок в slug.
+
+    Одинаковые заголовки (например, «Название заметки» по умолчанию)
+    встречаются постоянно, поэтому результат кэшируется. Счётчики
+    попаданий и промахов возвращает slugify_title.cache_info().
+    Заголовок без букв и цифр даёт EMPTY_TITLE_SLUG, а не пустой slug.
+    """
+    return slugify(title) or EMPTY_TITLE_SLUG
+
+
+def slugify_titles(titles):
+    """slug для пачки заголовков в том же порядке.
+
+    Каждый различный заголовок транслитерируется один раз за вызов.
+    """
+    slugs = {title: slugify_title(title) for title in dict.fromkeys(titles)}
+    return [slugs[title] for title in titles]
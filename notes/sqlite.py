@@ -0,0 +1,91 @@
+"""Профиль SQLite для работы под нагрузкой (NOTES_SQLITE_PRODUCTION=1).
+
+PRAGMA из settings.NOTES_SQLITE_PRAGMAS выполняются на каждом новом
+подключении (сигнал connection_created): WAL позволяет читать во время
+записи, synchronous=NORMAL в WAL не теряет согласованности при сбое
+процесса, cache_size и mmap_size держат горячие страницы в памяти.
+
+SQLite допускает одного писателя. Если два потока одного процесса
+пишут одновременно, один из них ждёт блокировку внутри SQLite
+и может получить «database is locked». WriteLockMiddleware выстраивает
+запросы, меняющие данные, в очередь на блокировке процесса. Блокировка
+берётся не в начале запроса, а перед первой пишущей командой SQL
+(BEGIN, INSERT, UPDATE, ...), и держится до конца запроса: проверка
+формы или пароля при входе идут параллельно, а писатели — по одному.
+"""
+import threading
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .middleware import AsyncCapableMiddleware
+
+UNSAFE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+
+WRITE_LOCK = threading.Lock()
+
+# Отметка запроса, которому разрешено писать только под WRITE_LOCK.
+_write_gate = ContextVar('sqlite_write_gate', default=None)
+
+
+class WriteGate:
+    held = False
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Выполняет NOTES_SQLITE_PRAGMAS на новом подключении SQLite."""
+    if connection.vendor != 'sqlite' or not settings.NOTES_SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.NOTES_SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_read(sql):
+    return sql.lstrip()[:6].upper() in ('SELECT', 'PRAGMA')
+
+
+def serialize_writes(execute, sql, params, many, context):
+    """Обёртка курсора: берёт WRITE_LOCK перед первой записью запроса."""
+    gate = _write_gate.get()
+    if gate is not None and not gate.held and not is_read(sql):
+        WRITE_LOCK.acquire()
+        gate.held = True
+    return execute(sql, params, many, context)
+
+
+def instrument_connection(connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    if serialize_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(serialize_writes)
+
+
+class WriteLockMiddleware(AsyncCapableMiddleware):
+    """Пропускает запросы, меняющие данные, по одному на процесс.
+
+    Под ASGI синхронные представления и так выполняются в одном потоке,
+    поэтому асинхронный путь пропускает запросы без блокировки.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        connection_created.connect(
+            instrument_connection, dispatch_uid='notes.sqlite'
+        )
+        for connection in connections.all():
+            instrument_connection(connection)
+
+    def __call__(self, request):
+        if self.is_async or request.method not in UNSAFE_METHODS:
+            return self.get_response(request)
+        gate = WriteGate()
+        token = _write_gate.set(gate)
+        try:
+            return self.get_response(request)
+        finally:
+            _write_gate.reset(token)
+            if gate.held:
+                WRITE_LOCK.release()
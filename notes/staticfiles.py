@@ -0,0 +1,205 @@
+"""Статика с хэшами в именах, сжатыми копиями и долгим кэшем.
+
+С NOTES_STATIC_MANIFEST=1 collectstatic сохраняет в STATIC_ROOT копии
+файлов с хэшем содержимого в имени (admin/css/base.5af66c1b1797.css)
+и таблицу staticfiles.json, по которой {% static %} подставляет эти
+имена. Текстовые файлы сразу сжимаются: рядом кладутся .gz и, если
+установлен пакет brotli, .br — на лету их сжимать не нужно.
+
+С NOTES_STATIC_SERVE=1 файлы из STATIC_ROOT отдаёт само приложение
+WSGI (StaticFilesApp в yanote/wsgi.py), не доходя до Django. Файл
+с хэшем в имени никогда не меняется: браузер хранит его год и не
+переспрашивает сервер (Cache-Control: immutable). Остальные файлы
+кэшируются на NOTES_STATIC_MAX_AGE секунд, а потом проверяются по ETag
+и Last-Modified. Список файлов читается при запуске процесса, поэтому
+после collectstatic процессы перезапускают.
+"""
+import json
+import mimetypes
+import os
+from wsgiref.headers import Headers
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import compression
+
+# Сжатые копии файла: способ сжатия, расширение и уровень — наибольший,
+# потому что сжатие выполняется один раз при сборке.
+PRECOMPRESSED = (
+    (compression.BROTLI, '.br', 11),
+    (compression.GZIP, '.gz', 9),
+)
+# Сжатая копия, которая экономит меньше 5 %, не сохраняется.
+MIN_SAVING = 0.05
+IMMUTABLE = 'public, max-age=31536000, immutable'
+BLOCK_SIZE = 64 * 1024
+
+
+def content_type(name):
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def precompressed_encodings():
+    return [
+        (encoding, suffix, level)
+        for encoding, suffix, level in PRECOMPRESSED
+        if encoding != compression.BROTLI or compression.brotli is not None
+    ]
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэши в именах файлов и сжатые копии текстовых файлов."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if content_type(name) in compression.COMPRESSIBLE_TYPES:
+                self.save_compressed(name)
+
+    def save_compressed(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for encoding, suffix, level in precompressed_encodings():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            compressed = compression.compress(data, encoding, level)
+            if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                self._save(name + suffix, ContentFile(compressed))
+
+
+class StaticFile:
+    """Файл из STATIC_ROOT и его сжатые копии."""
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.last_modified = http_date(stat.st_mtime)
+        self.mtime = int(stat.st_mtime)
+        self.etag = f'"{self.mtime:x}-{self.size:x}"'
+        self.content_type = content_type(path)
+        if self.content_type in compression.COMPRESSIBLE_TYPES:
+            self.content_type += '; charset=utf-8'
+        self.cache_control = (
+            IMMUTABLE if immutable
+            else f'public, max-age={settings.NOTES_STATIC_MAX_AGE}'
+        )
+        # Способ сжатия -> (путь, размер), в порядке предпочтения.
+        self.variants = {
+            encoding: (path + suffix, os.path.getsize(path + suffix))
+            for encoding, suffix, _ in PRECOMPRESSED
+            if os.path.exists(path + suffix)
+        }
+
+    def etag_for(self, encoding):
+        """ETag копии: тела копий различаются побайтово, и общий сильный
+        ETag перепутал бы их в кэшах и запросах Range."""
+        if encoding is None:
+            return self.etag
+        return f'"{self.mtime:x}-{self.size:x}-{encoding}"'
+
+    def not_modified(self, environ, etag):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or 'W/' + etag in tags
+        since = parse_http_date_safe(
+            environ.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return since is not None and self.mtime <= since
+
+    def choose(self, environ):
+        """Путь, размер и Content-Encoding копии для этого клиента."""
+        accepted = compression.accepted_encodings(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        for encoding, variant in self.variants.items():
+            if encoding in accepted:
+                return (*variant, encoding)
+        return self.path, self.size, None
+
+
+def read_manifest(root):
+    """Имена файлов с хэшем из staticfiles.json или пустое множество."""
+    try:
+        with open(os.path.join(root, 'staticfiles.json')) as manifest:
+            return set(json.load(manifest)['paths'].values())
+    except (OSError, ValueError, KeyError):
+        return set()
+
+
+def scan(root, prefix):
+    """URL -> StaticFile для всех файлов каталога root."""
+    hashed = read_manifest(root)
+    suffixes = tuple(suffix for _, suffix, _ in PRECOMPRESSED)
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(suffixes):
+                continue
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            files[prefix + relative] = StaticFile(path, relative in hashed)
+    return files
+
+
+class StaticFilesApp:
+    """WSGI-приложение: статика из STATIC_ROOT, остальное — application."""
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = scan(str(root or settings.STATIC_ROOT), self.prefix)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith(self.prefix):
+            return self.application(environ, start_response)
+        static_file = self.files.get(path)
+        if static_file is None:
+            return self.respond(start_response, '404 Not Found', [])
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return self.respond(
+                start_response, '405 Method Not Allowed',
+                [('Allow', 'GET, HEAD')],
+            )
+        file_path, size, encoding = static_file.choose(environ)
+        etag = static_file.etag_for(encoding)
+        headers = Headers([
+            ('Cache-Control', static_file.cache_control),
+            ('ETag', etag),
+            ('Last-Modified', static_file.last_modified),
+        ])
+        if static_file.variants:
+            headers['Vary'] = 'Accept-Encoding'
+        if static_file.not_modified(environ, etag):
+            return self.respond(
+                start_response, '304 Not Modified', headers.items()
+            )
+        headers['Content-Type'] = static_file.content_type
+        headers['Content-Length'] = str(size)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        start_response('200 OK', headers.items())
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        body = open(file_path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(body, BLOCK_SIZE)
+        return read_blocks(body)
+
+    def respond(self, start_response, status, headers):
+        start_response(status, [*headers, ('Content-Length', '0')])
+        return []
+
+
+def read_blocks(body):
+    with body:
+        yield from iter(lambda: body.read(BLOCK_SIZE), b'')
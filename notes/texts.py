@@ -0,0 +1,51 @@
+"""Сжатое хранение больших текстов заметок.
+
+Текст длиннее settings.NOTES_COMPRESS_TEXT_OVER символов хранится
+сжатым zlib в столбце Note.compressed_text, а в столбце text остаётся
+пустая строка. Список, поиск и удаление читают только нужные им поля,
+поэтому большой текст загружается лишь на странице заметки, при правке
+и в API. Страница заметки отдаёт его потоком, распаковывая по частям.
+"""
+import codecs
+import zlib
+
+from django.conf import settings
+from django.utils.html import escape
+
+# Сколько байт распаковывать за раз при потоковой отдаче.
+CHUNK_SIZE = 64 * 1024
+
+
+def is_large(text):
+    return len(text) > settings.NOTES_COMPRESS_TEXT_OVER
+
+
+def compress(text):
+    return zlib.compress(text.encode(), settings.NOTES_COMPRESS_LEVEL)
+
+
+def decompress(data):
+    return zlib.decompress(data).decode()
+
+
+def iter_escaped(data, chunk_size=CHUNK_SIZE):
+    """Распаковывает сжатый текст частями, экранируя их для HTML.
+
+    В памяти одновременно держится не больше chunk_size байт
+    распакованного текста, сколько бы он ни занимал целиком.
+    """
+    decompressor = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        pending = view[start:start + chunk_size]
+        while pending:
+            chunk = decoder.decode(
+                decompressor.decompress(pending, chunk_size)
+            )
+            if chunk:
+                yield escape(chunk)
+            pending = decompressor.unconsumed_tail
+    tail = decoder.decode(decompressor.flush(), final=True)
+    if tail:
+        yield escape(tail)
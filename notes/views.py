@@ -1,9 +1,25 @@
+from calendar import timegm
+from itertools import chain
+from uuid import uuid4
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
 from django.urls import reverse_lazy
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
+from django.utils.http import http_date
 from django.views import generic
 
-from .forms import NoteForm
-from .models import Note
+from . import fragments, search, texts
+from .forms import WARNING, NoteForm
+from .models import Note, NotesVersion
+from .pagination import KeysetPaginator
+
+# Поля заметки, которые показывает список.
+LIST_FIELDS = ('id', 'slug', 'title')
 
 
 class Home(generic.TemplateView):
@@ -22,38 +38,303 @@ class NoteBase(LoginRequiredMixin):
     success_url = reverse_lazy('notes:success')
 
     def get_queryset(self):
-        """Пользователь может работать только со своими заметками."""
+        """Пользователь может работать только со своими заметками.
+
+        slug уникален лишь в пределах автора, поэтому поиск заметки
+        по slug из URL всегда идёт в пространстве текущего пользователя.
+        """
         return self.model.objects.filter(author=self.request.user)
 
+    def get_notes_version(self):
+        """Версия заметок пользователя и время её изменения.
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+        Запрашивается один раз за запрос; None, если версии нет.
+        """
+        if not hasattr(self, '_notes_version'):
+            self._notes_version = NotesVersion.objects.filter(
+                author=self.request.user
+            ).values_list('version', 'updated').first()
+        return self._notes_version
+
+
+class NotesPageMixin:
+    """Страница, содержимое которой определяется версией заметок автора.
+
+    Наследники задают page_kind и get_page_parts() — всё, что кроме
+    версии отличает одну страницу от другой (slug, курсор и т. п.).
+    """
+    page_kind = None
+
+    def get_page_parts(self):
+        return ()
+
+
+class ConditionalGetMixin(NotesPageMixin):
+    """Отвечает 304 на If-None-Match / If-Modified-Since.
+
+    ETag и Last-Modified берутся из версии заметок автора, поэтому
+    для ответа 304 на If-None-Match не нужны ни запрос заметок, ни
+    отрисовка шаблона. На одно If-Modified-Since наследник проверяет
+    в check_page_exists(), что страница есть.
+    """
+
+    def check_page_exists(self):
+        """Бросает Http404, если страницы нет; вызывается перед 304."""
+
+    def get(self, request, *args, **kwargs):
+        notes_version = self.get_notes_version()
+        if notes_version is None:
+            return super().get(request, *args, **kwargs)
+        version, updated = notes_version
+        etag = quote_etag(':'.join(
+            str(part) for part in
+            (self.page_kind, request.user.pk, version, *self.get_page_parts())
+        ))
+        last_modified = timegm(updated.utctimetuple())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        elif 'HTTP_IF_NONE_MATCH' not in request.META:
+            # Совпавший ETag содержит slug и версию, то есть страница
+            # была при этой версии и есть сейчас. Last-Modified же общий
+            # для всех страниц автора: без проверки несуществующая
+            # заметка получила бы 304 вместо 404.
+            self.check_page_exists()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            # Страницы личные: общий кэш их не хранит, а браузер каждый
+            # раз переспрашивает сервер и получает дешёвый ответ 304.
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class FragmentCacheMixin(NotesPageMixin):
+    """Берёт основной блок страницы из кэша фрагментов.
+
+    При попадании страница собирается без запросов к заметкам, при
+    промахе блок отрисовывается из fragment_template_name и кэшируется.
+    В ключ входит версия заметок автора, так что любое их изменение
+    делает прежние фрагменты недоступными.
+    """
+    fragment_template_name = None
+    fragment_key = None
+
+    def get(self, request, *args, **kwargs):
+        notes_version = self.get_notes_version()
+        if settings.NOTES_FRAGMENT_CACHE and notes_version is not None:
+            self.fragment_key = fragments.make_key(
+                self.page_kind,
+                request.user.pk,
+                notes_version[0],
+                *self.get_page_parts(),
+            )
+            fragment = fragments.get_fragment(self.fragment_key)
+            if fragment is not None:
+                return self.response_class(
+                    request=request,
+                    template=[self.template_name],
+                    context={'view': self, 'fragment': fragment},
+                    using=self.template_engine,
+                )
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.fragment_key is not None:
+            context['fragment'] = render_to_string(
+                self.fragment_template_name, context, self.request
+            )
+            fragments.set_fragment(self.fragment_key, context['fragment'])
+        return context
+
+
+class NoteFormMixin:
+    """Сохранение формы заметки без предварительной проверки slug."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
-        return super().form_valid(form)
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            note = form.instance
+            # Ошибку уникальности превращаем в ошибку поля, только если
+            # slug действительно занят другой заметкой автора.
+            if note.slug not in note.taken_slugs(note.slug):
+                raise
+            form.add_error('slug', note.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def get_form_kwargs(self):
+        """Заметка создаётся сразу с автором — текущим пользователем."""
+        kwargs = super().get_form_kwargs()
+        kwargs['instance'] = self.model(author=self.request.user)
+        return kwargs
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
+
+    def get_object(self, queryset=None):
+        note = super().get_object(queryset)
+        note.load_text()
+        return note
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
+    def get_queryset(self):
+        # Сжатый большой текст на странице удаления не показывается.
+        return super().get_queryset().defer('compressed_text')
+
 
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+class NotesList(NoteBase, ConditionalGetMixin, FragmentCacheMixin,
+                generic.ListView):
+    """Список всех заметок пользователя.
+
+    Заметки выводятся постранично с курсорами after/before; из базы
+    читаются только поля, которые нужны шаблону. С NOTES_LIST_ROWS
+    вместо моделей строятся именованные кортежи, а список отдаётся
+    потоком.
+    """
     template_name = 'notes/list.html'
+    fragment_template_name = 'notes/includes/list_items.html'
+    paginator_class = KeysetPaginator
+    page_kind = 'list'
+
+    def get_page_parts(self):
+        return (
+            settings.NOTES_PAGE_SIZE,
+            self.request.GET.get('after', ''),
+            self.request.GET.get('before', ''),
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if settings.NOTES_LIST_ROWS:
+            return queryset.values_list(*LIST_FIELDS, named=True)
+        return queryset.only(*LIST_FIELDS)
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_PAGE_SIZE
+
+    def streams(self):
+        # Под ASGI поток отдаётся в цикле событий, где ORM недоступен.
+        return settings.NOTES_LIST_ROWS and not settings.NOTES_ASYNC_VIEWS
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.paginator_class(queryset, page_size)
+        if self.streams():
+            page = paginator.stream_page(
+                self.request.GET, settings.NOTES_LIST_CHUNK_SIZE
+            )
+        else:
+            page = paginator.get_page(self.request.GET)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        if self.streams():
+            # Список отдаётся потоком и целиком в памяти не собирается.
+            self.fragment_key = None
+        return super().get_context_data(**kwargs)
+
+    def render_to_response(self, context, **response_kwargs):
+        """В режиме NOTES_LIST_ROWS отдаёт список потоком: страница
+        отрисовывается с меткой на месте списка, а строки — частями."""
+        if not self.streams():
+            return super().render_to_response(context, **response_kwargs)
+        marker = uuid4().hex
+        head, tail = render_to_string(
+            self.get_template_names(), {**context, 'fragment': marker},
+            self.request,
+        ).split(marker, 1)
+        return StreamingHttpResponse(chain(
+            (head,), self.iter_list_items(context['page_obj']), (tail,)
+        ))
 
+    def iter_list_items(self, page):
+        """Части notes/includes/list_items.html для потоковой отдачи."""
+        rows = get_template('notes/includes/list_rows.html')
+        yield '<ul>\n'
+        for chunk in page.chunks(settings.NOTES_LIST_CHUNK_SIZE):
+            yield rows.render({'object_list': chunk}, self.request)
+            # Контекст шаблона ссылается сам на себя и освобождается
+            # только сборщиком мусора; строки части отпускаем сразу.
+            chunk.clear()
+        yield '</ul>\n'
+        yield get_template('notes/includes/list_pagination.html').render(
+            {'page_obj': page, 'is_paginated': page.has_other_pages()},
+            self.request,
+        )
 
-class NoteDetail(NoteBase, generic.DetailView):
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заголовкам и текстам заметок пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return super().get_queryset().only('id', 'slug', 'title')
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, page_size):
+        page = search.search_page(
+            queryset,
+            self.request.user.pk,
+            self.request.GET.get('q', ''),
+            self.request.GET.get('page'),
+            page_size,
+        )
+        return None, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NoteDetail(NoteBase, ConditionalGetMixin, FragmentCacheMixin,
+                 generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+    fragment_template_name = 'notes/includes/detail_body.html'
+    page_kind = 'detail'
+
+    def get_page_parts(self):
+        return (self.kwargs['slug'],)
+
+    def check_page_exists(self):
+        if not self.get_queryset().filter(slug=self.kwargs['slug']).exists():
+            raise Http404('Заметка не найдена.')
+
+    def get_context_data(self, **kwargs):
+        if self.object.compressed_text is not None:
+            # Большой текст не кэшируется: страница отдаётся потоком.
+            self.fragment_key = None
+        return super().get_context_data(**kwargs)
+
+    def render_to_response(self, context, **response_kwargs):
+        """Заметку с большим текстом отдаёт потоком: шаблон отрисовывается
+        с меткой на месте текста, а текст распаковывается частями."""
+        note = self.object
+        if note.compressed_text is None:
+            return super().render_to_response(context, **response_kwargs)
+        marker = uuid4().hex
+        note.text = marker
+        head, tail = render_to_string(
+            self.get_template_names(), context, self.request
+        ).split(marker, 1)
+        return StreamingHttpResponse(chain(
+            (head,), texts.iter_escaped(note.compressed_text), (tail,)
+        ))
@@ -0,0 +1,39 @@
+"""Предварительная компиляция шаблонов в каждом процессе.
+
+Загрузчик django.template.loaders.cached и окружение Jinja2 хранят
+скомпилированные шаблоны в памяти процесса, но заполняются лениво:
+первый запрос к каждой странице в каждом воркере читает файлы
+и разбирает шаблоны. warm_templates() вызывается из yanote/wsgi.py
+и yanote/asgi.py и загружает заранее все шаблоны из DIRS всех
+движков, в том числе подключаемые через extends и include.
+
+Шаблоны из каталогов templates/ приложений (APP_DIRS, например
+админки) не прогреваются: их компилирует первый запрос. Шаблоны
+регистрации лежат в templates/ проекта и прогреваются.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+
+
+def template_names(directory):
+    """Имена шаблонов каталога относительно него, в стиле «a/b.html»."""
+    directory = Path(directory)
+    return sorted(
+        path.relative_to(directory).as_posix()
+        for path in directory.rglob('*.html')
+    )
+
+
+def warm_templates():
+    """Компилирует шаблоны из DIRS всех движков; возвращает их число."""
+    if not settings.NOTES_TEMPLATE_WARMUP:
+        return 0
+    count = 0
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for name in template_names(directory):
+                engine.get_template(name)
+                count += 1
+    return count
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
 application = get_asgi_application()
+
+# Импорт после настройки Django: шаблонам нужны приложения и URL.
+from notes.warmup import warm_templates  # noqa: E402
+
+warm_templates()
@@ -1,5 +1,7 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,7 +39,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -45,10 +46,34 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Скомпилированные шаблоны хранятся в памяти процесса и при
+            # DEBUG = True; при разработке кэш сбрасывает автоперезагрузка.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Страницы notes/*.html на Jinja2 (каталог jinja2/); нужен пакет jinja2
+# из requirements-optional.txt.
+# Страницы, для которых нет шаблона Jinja2, отрисовывает DjangoTemplates;
+# общие base.html и includes/ всегда берутся из templates/.
+NOTES_JINJA2 = os.getenv('NOTES_JINJA2') == '1'
+if NOTES_JINJA2:
+    TEMPLATES.insert(0, {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [BASE_DIR / 'jinja2'],
+        'OPTIONS': {'environment': 'notes.jinja.environment'},
+    })
+
+# Компиляция всех шаблонов из DIRS при запуске каждого процесса
+# (yanote/wsgi.py и yanote/asgi.py), а не при первом запросе.
+NOTES_TEMPLATE_WARMUP = os.getenv('NOTES_TEMPLATE_WARMUP', '1') == '1'
+
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
@@ -59,6 +84,99 @@ DATABASES = {
     }
 }
 
+# Профиль SQLite для работы под нагрузкой: PRAGMA на каждом новом
+# подключении, постоянные подключения, ожидание блокировки до 20 секунд
+# и очередь запросов, меняющих данные, внутри процесса.
+NOTES_SQLITE_PRODUCTION = os.getenv('NOTES_SQLITE_PRODUCTION') == '1'
+NOTES_SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Отрицательное значение — в килобайтах: 64 МБ на подключение.
+    'cache_size': -65536,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+NOTES_SQLITE_PRAGMAS = {}
+if NOTES_SQLITE_PRODUCTION:
+    NOTES_SQLITE_PRAGMAS = NOTES_SQLITE_PRODUCTION_PRAGMAS
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default']['OPTIONS'] = {'timeout': 20}
+    MIDDLEWARE.insert(0, 'notes.sqlite.WriteLockMiddleware')
+
+# Реплики для чтения заметок: пути к копиям базы через запятую
+# (локально их обновляет команда notes_replicate). После записи
+# пользователь NOTES_REPLICA_PIN_SECONDS секунд читает с default —
+# это время должно быть больше отставания реплик.
+NOTES_REPLICA_DATABASES = []
+NOTES_REPLICA_PIN_SECONDS = 5
+for index, name in enumerate(
+        filter(None, os.getenv('NOTES_REPLICAS', '').split(','))):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'NAME': name,
+        # В тестах реплика — то же подключение, что и default.
+        'TEST': {'MIRROR': 'default'},
+    }
+    NOTES_REPLICA_DATABASES.append(f'replica{index}')
+if NOTES_REPLICA_DATABASES:
+    DATABASE_ROUTERS = ['notes.replicas.ReplicaRouter']
+    MIDDLEWARE.insert(0, 'notes.replicas.ReplicaMiddleware')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Redis-совместимый кэш, общий для всех процессов; нужен django-redis
+# из requirements-optional.txt. LocMemCache у каждого процесса свой:
+# режимы, которым нужно общее для процессов состояние, без Redis
+# не включаются.
+NOTES_SHARED_CACHE = bool(os.getenv('NOTES_REDIS_URL'))
+if NOTES_SHARED_CACHE:
+    CACHES['default'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('NOTES_REDIS_URL'),
+    }
+
+# Хранение сессий: db (по умолчанию), cached_db — кэш с базой
+# в качестве запасного хранилища, signed_cookies — сессия целиком
+# в подписанной cookie, без обращений к базе (при выходе такую сессию
+# нельзя отозвать на сервере, она лишь удаляется из браузера).
+# cached_db требует NOTES_REDIS_URL: с LocMemCache выход удалил бы
+# сессию из кэша только одного процесса, а остальные продолжали бы
+# её принимать.
+NOTES_SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+NOTES_SESSION_MODE = os.getenv('NOTES_SESSION_MODE', 'db')
+if NOTES_SESSION_MODE == 'cached_db' and not NOTES_SHARED_CACHE:
+    raise ImproperlyConfigured(
+        'NOTES_SESSION_MODE=cached_db требует общего кэша: '
+        'задайте NOTES_REDIS_URL.'
+    )
+SESSION_ENGINE = NOTES_SESSION_ENGINES[NOTES_SESSION_MODE]
+
+# Пользователь сессии берётся из кэша default и хранится там
+# NOTES_USER_CACHE_TIMEOUT секунд; изменение пользователя сбрасывает
+# кэш. ModelBackend остаётся вторым, чтобы не разлогинить сессии,
+# созданные до включения кэша. Нужен NOTES_REDIS_URL: сброс в своём
+# LocMemCache не дошёл бы до других процессов, и после смены пароля
+# или блокировки они помнили бы прежнего пользователя.
+NOTES_USER_CACHE = os.getenv('NOTES_USER_CACHE') == '1'
+NOTES_USER_CACHE_TIMEOUT = 60
+if NOTES_USER_CACHE:
+    if not NOTES_SHARED_CACHE:
+        raise ImproperlyConfigured(
+            'NOTES_USER_CACHE=1 требует общего кэша: задайте NOTES_REDIS_URL.'
+        )
+    AUTHENTICATION_BACKENDS = [
+        'notes.auth.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -82,8 +200,89 @@ USE_TZ = True
 
 
 STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Имена файлов статики с хэшем содержимого и сжатые при collectstatic
+# копии .gz/.br (notes.staticfiles). Нужен запуск collectstatic: без
+# staticfiles.json шаблоны с {% static %} не отрисуются.
+NOTES_STATIC_MANIFEST = os.getenv('NOTES_STATIC_MANIFEST') == '1'
+if NOTES_STATIC_MANIFEST:
+    STATICFILES_STORAGE = (
+        'notes.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+
+# Отдача статики из STATIC_ROOT самим приложением WSGI: файлы с хэшем
+# кэшируются браузером на год, остальные — на NOTES_STATIC_MAX_AGE
+# секунд.
+NOTES_STATIC_SERVE = os.getenv('NOTES_STATIC_SERVE') == '1'
+NOTES_STATIC_MAX_AGE = 60
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Количество заметок на одной странице списка.
+NOTES_PAGE_SIZE = int(os.getenv('NOTES_PAGE_SIZE', '50'))
+
+# Список заметок из именованных кортежей values_list() вместо моделей.
+# Страницы «вперёд» при этом отдаются потоком: строки читаются из базы
+# и отрисовываются частями по NOTES_LIST_CHUNK_SIZE, и память на запрос
+# не зависит от NOTES_PAGE_SIZE. Асинхронный список (NOTES_ASYNC_VIEWS)
+# читает кортежи, но не отдаёт их потоком.
+NOTES_LIST_ROWS = os.getenv('NOTES_LIST_ROWS') == '1'
+NOTES_LIST_CHUNK_SIZE = 500
+
+# Наибольшее число заметок в одном пакетном запросе JSON API.
+NOTES_API_BATCH_LIMIT = 100
+
+# Наибольшее число записей журнала в одном ответе ленты изменений.
+NOTES_CHANGES_PAGE_SIZE = 500
+
+# Тексты длиннее NOTES_COMPRESS_TEXT_OVER символов хранятся сжатыми
+# zlib (уровень NOTES_COMPRESS_LEVEL) и отдаются на странице заметки
+# потоком.
+NOTES_COMPRESS_TEXT_OVER = 64 * 1024
+NOTES_COMPRESS_LEVEL = 6
+
+# Кэш отрисованных фрагментов списка и страницы заметки.
+NOTES_FRAGMENT_CACHE = os.getenv('NOTES_FRAGMENT_CACHE') == '1'
+NOTES_FRAGMENT_CACHE_TIMEOUT = 600
+
+# Сжатие ответов gzip или brotli (если установлен пакет brotli).
+# Обычные ответы короче NOTES_COMPRESSION_MIN_SIZE байт не сжимаются;
+# сжатые страницы с ETag хранятся в кэше default.
+NOTES_COMPRESSION = os.getenv('NOTES_COMPRESSION') == '1'
+NOTES_COMPRESSION_MIN_SIZE = 1024
+NOTES_COMPRESSION_CACHE_TIMEOUT = 600
+NOTES_GZIP_LEVEL = 6
+NOTES_BROTLI_QUALITY = 5
+if NOTES_COMPRESSION:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+        'notes.compression.CompressionMiddleware',
+    )
+
+# Асинхронные главная, список и заметка (для запуска под ASGI)
+# и размер пула потоков, в котором они обращаются к базе.
+NOTES_ASYNC_VIEWS = os.getenv('NOTES_ASYNC_VIEWS') == '1'
+NOTES_ASYNC_DB_THREADS = int(os.getenv('NOTES_ASYNC_DB_THREADS', '16'))
+
+# Число SQL-запросов и задержки по представлениям: гистограммы
+# на странице /metrics и в команде notes_metrics. Интервал переноса
+# накопленного в процессе в общий кэш — в секундах; нужен
+# NOTES_REDIS_URL, иначе каждый процесс видит только свои запросы,
+# а команда — пустой отчёт. /metrics открыта
+# сотрудникам (is_staff) и адресам из NOTES_METRICS_ALLOWED_IPS через
+# запятую, например адресу сервера Prometheus.
+NOTES_METRICS = os.getenv('NOTES_METRICS') == '1'
+NOTES_METRICS_FLUSH_INTERVAL = 10
+NOTES_METRICS_ALLOWED_IPS = frozenset(
+    filter(None, os.getenv('NOTES_METRICS_ALLOWED_IPS', '').split(','))
+)
+if NOTES_METRICS:
+    if not NOTES_SHARED_CACHE:
+        raise ImproperlyConfigured(
+            'NOTES_METRICS=1 требует общего кэша: задайте NOTES_REDIS_URL.'
+        )
+    MIDDLEWARE.insert(0, 'notes.metrics.MetricsMiddleware')
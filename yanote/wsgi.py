@@ -14,3 +14,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
 application = get_wsgi_application()
+
+# Импорт после настройки Django: шаблонам нужны приложения и URL.
+from django.conf import settings  # noqa: E402
+
+from notes.warmup import warm_templates  # noqa: E402
+
+warm_templates()
+
+if settings.NOTES_STATIC_SERVE:
+    from notes.staticfiles import StaticFilesApp
+
+    application = StaticFilesApp(application)